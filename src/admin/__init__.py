@@ -1,48 +1,42 @@
-import asyncio
 import logging
 
-from flask import Flask, g
+from flask import request, url_for
 
 from db.models import Brand, Character, Product, TypeProduct, User
+from .flask_app import AdminFlask
 from .settings import Config
 
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
+app = AdminFlask(__name__)
 app.config.from_object(Config)
 
+# Таблицы в панели навигации: (имя таблицы, название)
+TABLES = (
+    (User.__tablename__, User.alt_table_name),
+    (Product.__tablename__, Product.alt_table_name),
+    (Brand.__tablename__, Brand.alt_table_name),
+    (Character.__tablename__, Character.alt_table_name),
+    (TypeProduct.__tablename__, TypeProduct.alt_table_name),
+)
 
-async def fetch_type_products():  # noqa
-    user = User.__tablename__, User.alt_table_name
-    type_product = TypeProduct.__tablename__, TypeProduct.alt_table_name
-    product = Product.__tablename__, Product.alt_table_name
-    brand = Brand.__tablename__, Brand.alt_table_name
-    character = Character.__tablename__, Character.alt_table_name
-    return (
-        user,
-        product,
-        brand,
-        character,
-        type_product,
-    )
 
+@app.context_processor
+def inject_type_products():  # noqa
+    return dict(tables=TABLES)
 
-@app.before_request
-def before_request():  # noqa
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    (g.user, g.product, g.brand, g.character, g.type_product) = (
-        loop.run_until_complete(fetch_type_products())
-    )
-    loop.close()
 
+@app.template_global()
+def url_with_args(**params):
+    """
+    Возвращает адрес текущей страницы с измененными параметрами запроса.
 
-@app.context_processor
-def inject_type_products():  # noqa
-    return dict(
-        tables=(g.user, g.product, g.brand, g.character, g.type_product),
-    )
+    Параметры со значением None удаляются из адреса.
+    """
+    args = request.args.to_dict(flat=False)
+    args.update(params)
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
 
 
 from . import (  # noqa
@@ -1,19 +1,66 @@
+from dataclasses import dataclass
 from http import HTTPStatus
+from math import ceil
 
+from sqlalchemy import func
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 
+from db.catalog import bump_catalog_version
 from db.core import get_async_session
-from db.models import Brand, Character, Product, TypeProduct
+from db.models import (
+    Brand,
+    Character,
+    Product,
+    ProductCharacterAssociation,
+    TypeProduct,
+)
 
 from .error_hendlers import InvalidAdminUsage
 
 NULL_PRICE = 0
 
 
+@dataclass
+class ObjectPage:
+    """
+    Страница списка объектов.
+
+    :param object_list: Объекты страницы.
+    :param number: Номер страницы, начиная с единицы.
+    :param per_page: Число объектов на странице.
+    :param total: Общее число объектов, подходящих под фильтры.
+    """
+
+    object_list: list
+    number: int
+    per_page: int
+    total: int
+
+    @property
+    def pages(self) -> int:
+        """Общее число страниц."""
+        return max(1, ceil(self.total / self.per_page))
+
+    @property
+    def has_prev(self) -> bool:
+        """Есть ли предыдущая страница."""
+        return self.number > 1
+
+    @property
+    def has_next(self) -> bool:
+        """Есть ли следующая страница."""
+        return self.number < self.pages
+
+
 class CRUDBase:
     """Базовый класс для CRUD операций."""
 
+    # Поля, по которым разрешена сортировка списка: имя -> выражение
+    sort_fields: dict = {}
+    # Связи, которые присоединяются для сортировки по полю: имя -> связь
+    sort_joins: dict = {}
+
     def __init__(self, model):
         """Инициализация."""
         self.model = model
@@ -25,6 +72,77 @@ class CRUDBase:
             object_list = object_list.scalars().all()
             return object_list
 
+    def filter_query(self, query, filters: dict):
+        """
+        Добавляет к запросу условия фильтров списка.
+
+        :param query: Запрос объектов.
+        :param filters: Значения фильтров, пустые значения не учитываются.
+        """
+        return query
+
+    def sort_query(self, query, sort: str | None, descending: bool):
+        """
+        Добавляет к запросу сортировку по разрешенному полю.
+
+        Неизвестное поле сортировки игнорируется. Последним всегда
+        сортируется id, чтобы порядок строк между страницами был
+        однозначным.
+
+        :param query: Запрос объектов.
+        :param sort: Имя поля сортировки из sort_fields.
+        :param descending: Сортировать ли по убыванию.
+        """
+        id_order = self.model.id.desc() if descending else self.model.id
+        column = self.sort_fields.get(sort)
+        if column is None:
+            return query.order_by(id_order)
+        if sort in self.sort_joins:
+            query = query.outerjoin(self.sort_joins[sort])
+        column_order = column.desc() if descending else column.asc()
+        return query.order_by(column_order.nulls_last(), id_order)
+
+    def get_page_options(self) -> list:
+        """Возвращает параметры загрузки объектов страницы."""
+        return []
+
+    async def get_object_page(
+        self,
+        page: int,
+        per_page: int,
+        sort: str | None = None,
+        descending: bool = False,
+        filters: dict = None,
+    ) -> ObjectPage:
+        """
+        Возвращает страницу списка объектов из БД.
+
+        Фильтры, сортировка и разбиение на страницы выполняются в БД,
+        загружаются только объекты запрошенной страницы.
+
+        :param page: Номер страницы, начиная с единицы. Номер больше
+        числа страниц заменяется последней страницей.
+        :param per_page: Число объектов на странице.
+        :param sort: Имя поля сортировки из sort_fields.
+        :param descending: Сортировать ли по убыванию.
+        :param filters: Значения фильтров для filter_query.
+        """
+        query = self.filter_query(select(self.model), filters or {})
+        async for session in get_async_session():
+            total = await session.scalar(
+                select(func.count()).select_from(query.subquery())
+            )
+            object_page = ObjectPage([], max(page, 1), per_page, total)
+            object_page.number = min(object_page.number, object_page.pages)
+            object_list = await session.execute(
+                self.sort_query(query, sort, descending)
+                .options(*self.get_page_options())
+                .offset((object_page.number - 1) * per_page)
+                .limit(per_page)
+            )
+            object_page.object_list = object_list.scalars().all()
+            return object_page
+
     async def check_object_uniq(self, uniq_field_value):
         """Проверяет объект из БД на уникальность."""
         async for session in get_async_session():
@@ -50,6 +168,7 @@ class CRUDBase:
                 )
             await session.delete(db_object)
             await session.commit()
+            bump_catalog_version()
 
     async def add_object(self, form_data):
         """Добавляет объект в БД."""
@@ -58,6 +177,7 @@ class CRUDBase:
             db_object = self.model(**form_data)
             session.add(db_object)
             await session.commit()
+            bump_catalog_version()
 
     async def edit_object(self, form_data, id):
         """Редактирует объект в БД."""
@@ -70,6 +190,7 @@ class CRUDBase:
                 if field.name in form_data:
                     setattr(db_object, field.name, form_data[field.name])
             await session.commit()
+            bump_catalog_version()
 
 
 crud_brand = CRUDBase(Brand)
@@ -80,6 +201,59 @@ crud_typeproduct = CRUDBase(TypeProduct)
 class CRUDProduct(CRUDBase):
     """Базовый класс для CRUD операций с моделью Product."""
 
+    sort_fields = {
+        "model": Product.model,
+        "typeproduct": TypeProduct.name,
+        "brand": Brand.name,
+        "price": Product.price,
+        "power": Product.power,
+        "created_at": Product.created_at,
+        "updated_at": Product.updated_at,
+    }
+    sort_joins = {
+        "typeproduct": Product.typeproduct,
+        "brand": Product.brand,
+    }
+
+    def filter_query(self, query, filters: dict):
+        """
+        Добавляет к запросу фильтры продуктов.
+
+        :param filters: Списки id brand_id, typeproduct_id, character_id
+        и границы диапазонов power_min, power_max, price_min, price_max.
+        Продукт подходит под фильтр характеристик, если у него есть
+        хотя бы одна из выбранных.
+        """
+        if filters.get("brand_id"):
+            query = query.where(Product.brand_id.in_(filters["brand_id"]))
+        if filters.get("typeproduct_id"):
+            query = query.where(
+                Product.typeproduct_id.in_(filters["typeproduct_id"])
+            )
+        if filters.get("character_id"):
+            query = query.where(
+                Product.id.in_(
+                    select(ProductCharacterAssociation.product_id).where(
+                        ProductCharacterAssociation.character_id.in_(
+                            filters["character_id"]
+                        )
+                    )
+                )
+            )
+        for field, column in (
+            ("power", Product.power),
+            ("price", Product.price),
+        ):
+            if filters.get(f"{field}_min") is not None:
+                query = query.where(column >= filters[f"{field}_min"])
+            if filters.get(f"{field}_max") is not None:
+                query = query.where(column <= filters[f"{field}_max"])
+        return query
+
+    def get_page_options(self) -> list:
+        """Загружает характеристики продуктов страницы одним запросом."""
+        return [selectinload(Product.character)]
+
     async def check_object_uniq(self, uniq_field_value):
         """Проверяет объект из БД на уникальность."""
         async for session in get_async_session():
@@ -129,6 +303,7 @@ class CRUDProduct(CRUDBase):
                     )
                     session.add(product_character)
             await session.commit()
+            bump_catalog_version()
 
     async def edit_object(self, form_data, id, through_model, characters_data):
         """Редактирует объект в БД со связанными объектами."""
@@ -186,6 +361,7 @@ class CRUDProduct(CRUDBase):
                         )
                         session.add(product_character)
             await session.commit()
+            bump_catalog_version()
 
 
 crud_product = CRUDProduct(Product)
@@ -0,0 +1,85 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from contextvars import copy_context
+
+from flask import Flask
+
+logger = logging.getLogger(__name__)
+
+
+class AdminFlask(Flask):
+    """
+    Flask-приложение, выполняющее асинхронные представления в одном цикле.
+
+    Стандартный Flask создает для каждого асинхронного представления
+    новый цикл событий, из-за чего соединения с базой нельзя
+    переиспользовать между запросами. Здесь представления выполняются
+    в долгоживущем цикле событий: при запуске из main.py - в цикле бота,
+    общем с пулом соединений, иначе - в собственном фоновом потоке.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Инициализация."""
+        super().__init__(*args, **kwargs)
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._loop_lock = threading.Lock()
+
+    def use_event_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Задает цикл событий для асинхронных представлений.
+
+        :param loop: Работающий цикл событий, поток представлений
+        не должен его блокировать.
+        """
+        self.loop = loop
+
+    def get_event_loop(self) -> asyncio.AbstractEventLoop:
+        """Возвращает цикл событий, при необходимости запуская свой."""
+        with self._loop_lock:
+            if self.loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever,
+                    name="admin-event-loop",
+                    daemon=True,
+                ).start()
+                logger.info("Запущен цикл событий админ-панели.")
+                self.loop = loop
+        return self.loop
+
+    def async_to_sync(self, func):
+        """Выполняет корутину представления в общем цикле событий."""
+
+        def wrapper(*args, **kwargs):
+            loop = self.get_event_loop()
+            try:
+                running_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                running_loop = None
+            if running_loop is loop:
+                raise RuntimeError(
+                    "Представление нельзя выполнять в потоке цикла событий "
+                    "админ-панели."
+                )
+            # Контекст запроса Flask передается в задачу цикла
+            context = copy_context()
+            future = concurrent.futures.Future()
+
+            def set_result(task: asyncio.Task) -> None:
+                if task.cancelled():
+                    future.cancel()
+                elif task.exception() is not None:
+                    future.set_exception(task.exception())
+                else:
+                    future.set_result(task.result())
+
+            def start() -> None:
+                task = loop.create_task(func(*args, **kwargs), context=context)
+                task.add_done_callback(set_result)
+
+            loop.call_soon_threadsafe(start)
+            return future.result()
+
+        return wrapper
@@ -7,7 +7,7 @@ from admin import app
 from db.core import get_async_session
 from db.models import User
 
-from .permission import requires_permission
+from .permission import remember_auth_user, requires_permission
 
 
 @app.route("/")
@@ -38,6 +38,7 @@ async def login():
             user = result.scalar_one_or_none()
             if user and await user.check_password(password):
                 s["user_id"] = user.id
+                remember_auth_user(user)
                 return redirect(url_for("home"))
         flash("Неверный логин или пароль", "danger")
         return redirect(url_for("login"))
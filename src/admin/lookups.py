@@ -0,0 +1,57 @@
+import logging
+
+from sqlalchemy import literal, select, union_all
+
+from db.cache import TTLCache
+from db.catalog import get_catalog_version
+from db.config import settings
+from db.core import get_async_session
+from db.models import Brand, Character, TypeProduct
+
+logger = logging.getLogger(__name__)
+
+# Справочники для выпадающих списков: имя в контексте шаблона -> модель
+LOOKUP_TABLES = {
+    "brand_list": Brand,
+    "character_list": Character,
+    "type_product_list": TypeProduct,
+}
+
+# Кеш справочников: версия каталога -> справочники. Запись в таблицы
+# каталога меняет версию, и справочники загружаются заново
+lookup_cache = TTLCache("справочников", 1, settings.ADMIN_LOOKUP_CACHE_TTL)
+
+
+async def get_lookup_lists() -> dict[str, tuple[tuple[int, str], ...]]:
+    """
+    Возвращает справочники брендов, характеристик и типов продукции.
+
+    Пары (id, название) всех справочников загружаются одним запросом
+    и кешируются до следующего изменения каталога.
+
+    :return: Словарь для контекста шаблона: имя справочника -> пары
+    (id, название), упорядоченные по id.
+    """
+    version = get_catalog_version()
+    lookups = lookup_cache.get(version)
+    if lookups is not None:
+        return lookups
+
+    query = union_all(
+        *(
+            select(literal(name).label("lookup"), model.id, model.name)
+            for name, model in LOOKUP_TABLES.items()
+        )
+    ).order_by("lookup", "id")
+    lists = {name: [] for name in LOOKUP_TABLES}
+    async for session in get_async_session():
+        rows = await session.execute(query)
+        for name, id, value in rows:
+            lists[name].append((id, value))
+    # Справочники общие для всех запросов, поэтому неизменяемые
+    lookups = {name: tuple(pairs) for name, pairs in lists.items()}
+    # Если каталог изменился во время запроса, запись уйдет под старую
+    # версию и не будет прочитана
+    lookup_cache.set(version, lookups)
+    logger.info("Справочники админ-панели загружены.")
+    return lookups
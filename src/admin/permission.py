@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from functools import wraps
 
 from flask import flash, redirect
@@ -5,8 +6,63 @@ from flask import session as s
 from flask import url_for
 from sqlalchemy.future import select
 
+from db.cache import TTLCache
+from db.config import settings
 from db.core import get_async_session
-from db.models import User
+from db.models import User, UserRoleType
+from db.models.user import role_has_permission
+
+
+@dataclass(frozen=True)
+class AuthUser:
+    """Данные пользователя, вошедшего в административную панель."""
+
+    id: int
+    login: str
+    role: UserRoleType
+
+    def has_permission(self, permission: str) -> bool:
+        """Проверка, имеет ли пользователь определенные права."""
+        return role_has_permission(self.role, permission)
+
+
+# Кеш пользователей панели: id пользователя -> AuthUser
+auth_user_cache = TTLCache(
+    "пользователей админ-панели",
+    settings.AUTH_USER_CACHE_SIZE,
+    settings.AUTH_USER_CACHE_TTL,
+)
+
+
+def remember_auth_user(user: User) -> AuthUser:
+    """Запоминает пользователя, например при входе в панель."""
+    auth_user = AuthUser(id=user.id, login=user.login, role=user.role)
+    auth_user_cache.set(user.id, auth_user)
+    return auth_user
+
+
+def forget_auth_user(user_id: int) -> None:
+    """Удаляет пользователя из кеша после изменения или удаления."""
+    auth_user_cache.pop(user_id)
+
+
+async def get_auth_user(user_id: int) -> AuthUser | None:
+    """
+    Возвращает пользователя панели по id.
+
+    Пользователь берется из кеша, а при промахе загружается из базы.
+    Изменения в других процессах видны не позже чем через
+    AUTH_USER_CACHE_TTL секунд.
+    """
+    auth_user = auth_user_cache.get(user_id)
+    if auth_user is not None:
+        return auth_user
+    async for session in get_async_session():
+        result = await session.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is None:
+            return None
+        return remember_auth_user(user)
 
 
 def requires_permission(permission):
@@ -22,14 +78,10 @@ def requires_permission(permission):
                     "danger",
                 )
                 return redirect(url_for("login"))
-            async for session in get_async_session():
-                result = await session.execute(
-                    select(User).where(User.id == user_id)
-                )
-                user = result.scalar_one_or_none()
-                if user is None or not await user.has_permission(permission):
-                    flash("У вас недостаточно прав доступа.", "danger")
-                    return redirect(url_for("home"))
+            user = await get_auth_user(user_id)
+            if user is None or not user.has_permission(permission):
+                flash("У вас недостаточно прав доступа.", "danger")
+                return redirect(url_for("home"))
             if "user" in f.__code__.co_varnames:
                 kwargs["user"] = user
             return await f(*args, **kwargs)
@@ -1,11 +1,41 @@
 from flask import flash, redirect, render_template, request, url_for
 
+from db.config import settings
 from db.models import Product, ProductCharacterAssociation, UserRoleType
 
 from . import app
-from .crud import crud_brand, crud_character, crud_product, crud_typeproduct
+from .crud import crud_product
+from .lookups import get_lookup_lists
 from .permission import requires_permission
 
+# Столбцы таблицы, по которым можно сортировать: название -> поле sort
+SORT_COLUMNS = {
+    Product.MODEL: "model",
+    Product.TYPEPRODUCT: "typeproduct",
+    Product.BRAND: "brand",
+    Product.PRICE: "price",
+    Product.POWER: "power",
+    Product.CREATE: "created_at",
+    Product.UPDATE: "updated_at",
+}
+
+
+def get_product_filters(args) -> dict:
+    """
+    Возвращает фильтры списка продуктов из параметров запроса.
+
+    Некорректные значения параметров пропускаются.
+    """
+    filters = {
+        field: args.getlist(field, type=int)
+        for field in ("brand_id", "typeproduct_id", "character_id")
+    }
+    for field in ("power_min", "power_max"):
+        filters[field] = args.get(field, type=float)
+    for field in ("price_min", "price_max"):
+        filters[field] = args.get(field, type=int)
+    return filters
+
 
 @app.route("/admin/products", methods=["GET", "POST"])
 @requires_permission("view")
@@ -17,30 +47,26 @@ async def product_list_view(user):
             return redirect(request.referrer or url_for("brand_list_view"))
         product_id = int(request.form["object_id"])
         await crud_product.delete_object(product_id)
-    # filter
-    # if request.args:
-    #    field = request.args['filter']
-    #    value = int(request.args['value'])
-    #    field = Product.__table__.columns[field]
-    #    print(f'Field: {field}, Type: {type(field)}')
-    product_list = await crud_product.get_object_list()
-    brand_list = [
-        (brand.id, brand.name) for brand in await crud_brand.get_object_list()
-    ]
-    character_list = [
-        (character.id, character.name)
-        for character in await crud_character.get_object_list()
-    ]
-    type_product_list = [
-        (type_product.id, type_product.name)
-        for type_product in await crud_typeproduct.get_object_list()
-    ]
+    filters = get_product_filters(request.args)
+    sort = request.args.get("sort")
+    descending = request.args.get("order") == "desc"
+    product_page = await crud_product.get_object_page(
+        request.args.get("page", 1, type=int),
+        settings.ADMIN_PAGE_SIZE,
+        sort,
+        descending,
+        filters,
+    )
+    lookups = await get_lookup_lists()
     context = {
         "table": Product,
-        "object_list": product_list,
-        "brand_list": brand_list,
-        "character_list": character_list,
-        "type_product_list": type_product_list,
+        "object_list": product_page.object_list,
+        "page": product_page,
+        "filters": filters,
+        "sort": sort,
+        "descending": descending,
+        "sort_columns": SORT_COLUMNS,
+        **lookups,
     }
     return render_template("object.html", **context)
 
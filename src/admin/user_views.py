@@ -5,7 +5,7 @@ from db.core import get_async_session
 from db.models import User, UserRoleType
 
 from . import app
-from .permission import requires_permission
+from .permission import forget_auth_user, requires_permission
 
 
 @app.route("/admin/users")
@@ -48,6 +48,7 @@ async def user_delete_view(user, user_id):
         if user:
             await session.delete(user)
             await session.commit()
+    forget_auth_user(user_id)
     return redirect(url_for("user_list_view"))
 
 
@@ -62,6 +63,7 @@ async def change_password_view(user, user_id):
         if user:
             await user.set_password(new_password)
             await session.commit()
+    forget_auth_user(user_id)
 
     flash("Пароль успешно изменен.", "success")
     return redirect(url_for("user_list_view"))
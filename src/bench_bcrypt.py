@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+import bcrypt
+import click
+
+from db.config import settings
+from db.models import User
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float) -> float:
+    """Возвращает максимальную задержку срабатывания таймера цикла."""
+    max_lag = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, time.perf_counter() - started - interval)
+    return max_lag
+
+
+async def run_logins(logins: int, in_executor: bool) -> tuple[float, float]:
+    """Выполняет одновременные проверки пароля и замеряет цикл событий."""
+    user = User(login="benchmark")
+    await user.set_password("benchmark")
+
+    async def check_password():
+        if in_executor:
+            return await user.check_password("benchmark")
+        # Проверка прямо в цикле событий, как до выноса в потоки
+        return bcrypt.checkpw(b"benchmark", user.password_hash.encode())
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop, 0.01))
+    started = time.perf_counter()
+    await asyncio.gather(*(check_password() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return elapsed, await lag_task
+
+
+@click.command()
+@click.option("--logins", default=10, help="Число одновременных входов.")
+def bench_bcrypt(logins):
+    """Сравнивает задержку цикла событий при проверке паролей bcrypt."""
+    click.echo(
+        f"BCRYPT_ROUNDS={settings.BCRYPT_ROUNDS}, "
+        f"BCRYPT_WORKERS={settings.BCRYPT_WORKERS}, входов: {logins}"
+    )
+    for title, in_executor in (
+        ("В цикле событий", False),
+        ("В пуле потоков", True),
+    ):
+        elapsed, max_lag = asyncio.run(run_logins(logins, in_executor))
+        click.echo(
+            f"{title}: {elapsed * 1000:.0f} мс на все входы, "
+            f"макс. задержка цикла {max_lag * 1000:.1f} мс"
+        )
+
+
+if __name__ == "__main__":
+    bench_bcrypt()
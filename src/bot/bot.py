@@ -2,11 +2,12 @@ import logging
 
 from telegram.ext import (
     Application,
-    CallbackQueryHandler,
     CommandHandler,
+    ContextTypes,
     ConversationHandler,
 )
 
+from bot.context import BotApplication, BotContext
 from bot.handlers import (
     handle_back,
     handle_no_answer,
@@ -22,6 +23,20 @@ from bot.handlers import (
     show_model_info,
     start,
 )
+from bot.persistence import get_persistence
+from bot.processor import ChatUpdateProcessor
+from bot.router import (
+    ABOUT,
+    BACK,
+    MULTIPLE,
+    NEXT,
+    NO_ANSWER,
+    PREV,
+    SELECT_CATEGORY_COMMAND,
+    START,
+    STEP_FORWARD,
+    CallbackRouter,
+)
 from bot.variables import (
     SELECT_BRAND,
     SELECT_CATEGORY,
@@ -30,6 +45,7 @@ from bot.variables import (
     SELECT_TYPE,
     SHOW_RESULT,
 )
+from bot.webhook import UpdateQueue
 from db.config import LOG_FORMAT, settings
 
 logging.basicConfig(
@@ -38,101 +54,102 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+update_processor = ChatUpdateProcessor(settings.BOT_CONCURRENT_UPDATES)
 
-application = Application.builder().token(settings.BOT_TOKEN).build()
+application = (
+    Application.builder()
+    .token(settings.BOT_TOKEN)
+    .application_class(BotApplication)
+    .context_types(ContextTypes(context=BotContext))
+    .persistence(get_persistence())
+    .concurrent_updates(update_processor)
+    .update_queue(UpdateQueue(settings.UPDATE_QUEUE_SIZE, update_processor))
+    .build()
+)
 
 
 async def setup_handlers():
     """
     Настраивает обработчики команд и событий для Telegram бота.
 
-    Использует ConversationHandler для управления состояниями диалогов.
+    Использует ConversationHandler для управления состояниями диалогов,
+    нажатия кнопок в каждом состоянии разбирает один CallbackRouter.
     """
+    # Общие маршруты этапов отбора
+    step_routes = {
+        BACK: handle_back,
+        START: handle_start,
+        PREV: handle_pagination,
+        NEXT: handle_pagination,
+        NO_ANSWER: handle_no_answer,
+        STEP_FORWARD: handle_step_forward,
+    }
     conv_handler = ConversationHandler(
         entry_points=[CommandHandler("start", start)],
         states={
             SELECT_CATEGORY: [
-                CallbackQueryHandler(show_about, pattern="^about$"),
-                CallbackQueryHandler(
-                    select_category, pattern="^select-category$"
-                ),
-                CallbackQueryHandler(handle_back, pattern="^back$"),
-                CallbackQueryHandler(handle_start, pattern="^start$"),
-                CallbackQueryHandler(
-                    handle_pagination, pattern="^(prev|next)_[0-9]+$"
-                ),
-                CallbackQueryHandler(handle_no_answer, pattern="^no_answer$"),
-                CallbackQueryHandler(select_category, pattern="^multiple"),
-                CallbackQueryHandler(
-                    handle_step_forward, pattern="^step-forward"
+                CallbackRouter(
+                    {
+                        **step_routes,
+                        ABOUT: show_about,
+                        SELECT_CATEGORY_COMMAND: select_category,
+                        MULTIPLE: select_category,
+                    }
                 ),
             ],
             SELECT_TYPE: [
-                CallbackQueryHandler(select_type, pattern="^category_"),
-                CallbackQueryHandler(handle_back, pattern="^back$"),
-                CallbackQueryHandler(handle_start, pattern="^start$"),
-                CallbackQueryHandler(
-                    handle_pagination, pattern="^(prev|next)_[0-9]+$"
-                ),
-                CallbackQueryHandler(handle_no_answer, pattern="^no_answer$"),
-                CallbackQueryHandler(select_type, pattern="^multiple"),
-                CallbackQueryHandler(
-                    handle_step_forward, pattern="^step-forward"
+                CallbackRouter(
+                    {
+                        **step_routes,
+                        "category": select_type,
+                        MULTIPLE: select_type,
+                    }
                 ),
             ],
             SELECT_POWER: [
-                CallbackQueryHandler(select_power, pattern="^type_"),
-                CallbackQueryHandler(handle_back, pattern="^back$"),
-                CallbackQueryHandler(handle_start, pattern="^start$"),
-                CallbackQueryHandler(
-                    handle_pagination, pattern="^(prev|next)_[0-9]+$"
-                ),
-                CallbackQueryHandler(handle_no_answer, pattern="^no_answer$"),
-                CallbackQueryHandler(select_power, pattern="^multiple"),
-                CallbackQueryHandler(
-                    handle_step_forward, pattern="^step-forward"
+                CallbackRouter(
+                    {
+                        **step_routes,
+                        "type": select_power,
+                        MULTIPLE: select_power,
+                    }
                 ),
             ],
             SELECT_BRAND: [
-                CallbackQueryHandler(select_brand, pattern="^power_"),
-                CallbackQueryHandler(handle_back, pattern="^back$"),
-                CallbackQueryHandler(handle_start, pattern="^start$"),
-                CallbackQueryHandler(
-                    handle_pagination, pattern="^(prev|next)_[0-9]+$"
-                ),
-                CallbackQueryHandler(handle_no_answer, pattern="^no_answer$"),
-                CallbackQueryHandler(select_brand, pattern="^multiple"),
-                CallbackQueryHandler(
-                    handle_step_forward, pattern="^step-forward"
+                CallbackRouter(
+                    {
+                        **step_routes,
+                        "power": select_brand,
+                        MULTIPLE: select_brand,
+                    }
                 ),
             ],
             SELECT_MODEL: [
-                CallbackQueryHandler(select_model, pattern="^brand_"),
-                CallbackQueryHandler(handle_back, pattern="^back$"),
-                CallbackQueryHandler(handle_start, pattern="^start$"),
-                CallbackQueryHandler(
-                    handle_pagination, pattern="^(prev|next)_[0-9]+$"
-                ),
-                CallbackQueryHandler(handle_no_answer, pattern="^no_answer$"),
-                CallbackQueryHandler(select_model, pattern="^multiple"),
-                CallbackQueryHandler(
-                    handle_step_forward, pattern="^step-forward"
+                CallbackRouter(
+                    {
+                        **step_routes,
+                        "brand": select_model,
+                        MULTIPLE: select_model,
+                    }
                 ),
             ],
             SHOW_RESULT: [
-                CallbackQueryHandler(show_model_info, pattern="^model_"),
-                CallbackQueryHandler(
-                    select_category, pattern="^select-category$"
-                ),
-                CallbackQueryHandler(
-                    handle_pagination, pattern="^(prev|next)_[0-9]+$"
+                CallbackRouter(
+                    {
+                        "model": show_model_info,
+                        SELECT_CATEGORY_COMMAND: select_category,
+                        PREV: handle_pagination,
+                        NEXT: handle_pagination,
+                        NO_ANSWER: handle_no_answer,
+                        START: handle_start,
+                        BACK: handle_back,
+                        ABOUT: show_about,
+                    }
                 ),
-                CallbackQueryHandler(handle_no_answer, pattern="^no_answer$"),
-                CallbackQueryHandler(handle_start, pattern="^start$"),
-                CallbackQueryHandler(handle_back, pattern="^back$"),
-                CallbackQueryHandler(show_about, pattern="^about$"),
             ],
         },
         fallbacks=[CommandHandler("start", handle_start)],
+        name="selection_dialog",
+        persistent=True,
     )
     application.add_handler(conv_handler)
@@ -0,0 +1,88 @@
+import logging
+from contextvars import ContextVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from telegram import Update
+from telegram.ext import Application, CallbackContext, ExtBot
+
+from db.core import async_session_factory
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateSessionScope:
+    """Сессия базы данных, общая для всех обработчиков одного обновления."""
+
+    def __init__(self):
+        """Инициализация."""
+        self._session: AsyncSession | None = None
+
+    @property
+    def session(self) -> AsyncSession:
+        """Возвращает сессию, создавая ее при первом обращении."""
+        if self._session is None:
+            self._session = async_session_factory()
+        return self._session
+
+    async def close(self) -> None:
+        """Закрывает сессию, если она была создана."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+_update_scope: ContextVar[UpdateSessionScope | None] = ContextVar(
+    "update_scope", default=None
+)
+
+
+def get_update_session() -> AsyncSession:
+    """Возвращает сессию базы данных текущего обновления."""
+    scope = _update_scope.get()
+    if scope is None:
+        raise RuntimeError(
+            "Сессия базы данных доступна только при обработке обновления."
+        )
+    return scope.session
+
+
+class BotContext(CallbackContext[ExtBot, dict, dict, dict]):
+    """Контекст обработчиков с доступом к сессии базы данных."""
+
+    def __init__(self, *args, **kwargs):
+        """Инициализация."""
+        super().__init__(*args, **kwargs)
+        # Разобранная callback_data нажатой кнопки, см. bot.router
+        self.action = None
+
+    @property
+    def db_session(self) -> AsyncSession:
+        """
+        Сессия базы данных текущего обновления.
+
+        Создается при первом обращении и закрывается после того, как
+        все обработчики обновления завершат работу.
+        """
+        return get_update_session()
+
+
+class BotApplication(Application):
+    """Приложение, открывающее сессию базы данных на каждое обновление."""
+
+    async def process_update(self, update: object) -> None:
+        """Обрабатывает обновление в рамках собственной сессии."""
+        scope = UpdateSessionScope()
+        token = _update_scope.set(scope)
+        try:
+            await super().process_update(update)
+        finally:
+            _update_scope.reset(token)
+            try:
+                await scope.close()
+            except Exception as e:
+                update_id = (
+                    update.update_id if isinstance(update, Update) else None
+                )
+                logger.error(
+                    f"Ошибка при закрытии сессии обновления {update_id}: {e}"
+                )
@@ -1,29 +1,138 @@
 import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
 
-from sqlalchemy import Select, or_, select
+from sqlalchemy import (
+    ARRAY,
+    ColumnElement,
+    Float,
+    Integer,
+    Select,
+    any_,
+    bindparam,
+    func,
+    literal,
+    select,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.variables import FILTER_STEPS_DATA
+from bot.facets import facet_index
+from bot.utils import get_range_label
+from bot.variables import (
+    DATA_NOT_FOUND_TEXT,
+    FILTER_STEPS_DATA,
+    ITEMS_PER_PAGE,
+)
+from db.cache import TTLCache
+from db.catalog import get_catalog_version, register_catalog_listener
+from db.config import settings
+from db.models import Product
 
 logger = logging.getLogger(__name__)
 
+# Кеш этапов отбора: (версия каталога, этап, выбор) -> результат
+# и (версия каталога, этап, выбор, страница) -> страница. Из него же
+# берутся страницы при возврате назад
+step_cache = TTLCache(
+    "этапов отбора", settings.STEP_CACHE_SIZE, settings.STEP_CACHE_TTL
+)
+register_catalog_listener(step_cache.invalidate)
+# Кеш карточек продуктов: id продукта -> данные карточки
+product_cache = TTLCache(
+    "карточек продуктов",
+    settings.PRODUCT_CACHE_SIZE,
+    settings.PRODUCT_CACHE_TTL,
+)
+register_catalog_listener(product_cache.invalidate)
 
-def get_valid_min_max_from_range(value: str) -> tuple[float, float]:
-    """Проверяет, является ли строка корректным диапазоном."""
-    if " - " in value:
-        try:
-            value_min, value_max = value.split(" - ")
-            return float(value_min), float(value_max)
-        except ValueError as e:
-            logger.error(
-                (
-                    f"Ошибка при разбиении значения диапазона: "
-                    f"{value}. Ошибка: {e}"
-                )
+
+@dataclass
+class Page:
+    """Страница результата этапа отбора."""
+
+    # Кнопки текущей страницы в формате fetch_data_from_db
+    items: list[dict]
+    # Номер страницы, начиная с нуля
+    number: int
+    # Общее число элементов на этапе
+    total: int
+    message_text: str
+    # Значение поля сортировки последнего элемента страницы
+    cursor: Any = None
+
+    @property
+    def total_pages(self) -> int:
+        """Возвращает общее число страниц."""
+        return (self.total + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
+
+
+async def get_product_detail(
+    session: AsyncSession, product_id: int
+) -> dict | None:
+    """
+    Возвращает данные карточки продукта по его id.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param product_id: Идентификатор продукта.
+    :return: Словарь с полями FILTER_STEPS_DATA[6]["button_fields"]
+    или None, если продукт не найден.
+    """
+    detail = product_cache.get(product_id)
+    if detail is not None:
+        return detail
+
+    detail_step = FILTER_STEPS_DATA[6]
+    row = (
+        await session.execute(
+            select(*detail_step["query_fields"]).where(
+                Product.id == product_id
             )
-    else:
-        logger.error(f"Некорректный формат значения диапазона: {value}")
-        raise ValueError(f"Некорректный формат значения диапазона: {value}")
+        )
+    ).first()
+    if row is None:
+        logger.warning(f"Продукт с ID {product_id} не найден.")
+        return None
+
+    detail = dict(zip(detail_step["button_fields"], row))
+    product_cache.set(product_id, detail)
+    return detail
+
+
+def get_cache_key(
+    selected_values: dict[int, list], current_step_number: int
+) -> tuple:
+    """
+    Возвращает ключ кеша для этапа отбора.
+
+    Учитываются только предыдущие этапы с непустым выбором, значения
+    сортируются, поэтому порядок нажатия кнопок на ключ не влияет.
+    Ключ включает версию каталога на начало запроса: результат запроса,
+    завершившегося после изменения каталога, сохраняется под старой
+    версией и больше не читается.
+    """
+    return (
+        get_catalog_version(),
+        current_step_number,
+        tuple(
+            (step_number, tuple(sorted(set(values), key=str)))
+            for step_number, values in sorted(selected_values.items())
+            if step_number < current_step_number and values
+        ),
+    )
+
+
+def get_range_bucket(filter_step: dict) -> ColumnElement:
+    """
+    Возвращает SQL-выражение номера диапазона для поля этапа.
+
+    Ширина диапазона подставляется в текст запроса, чтобы одинаковые
+    выражения в SELECT и GROUP BY совпадали для PostgreSQL.
+    """
+    full_range = filter_step["range"] + filter_step["range_step"]
+    return func.floor(
+        filter_step["where_field"] / literal(full_range, literal_execute=True)
+    )
 
 
 async def fetch_data_from_db(
@@ -34,24 +143,58 @@ async def fetch_data_from_db(
     """
     Возвращает результат запроса к базе по настройкам отбора.
 
+    Результат кешируется по номеру этапа и выбранным значениям, поэтому
+    пагинация, множественный выбор и возврат назад не повторяют запрос.
+    Если включен индекс фасетов (FACET_ENGINE_ENABLED), ответ строится
+    в памяти процесса, а запрос к базе остается запасным вариантом.
+    Возвращаемый словарь общий для всех пользователей, изменять его нельзя.
+
     :param session: Асинхронная сессия SQLAlchemy
     :param selected_values: Словарь с ключами по номерам этапов
     и значениями в виде списков выбранных значений на каждом этапе.
     :param current_step_number: Номер текущего этапа.
     """
+    cache_key = get_cache_key(selected_values, current_step_number)
+    result_dict = step_cache.get(cache_key)
+    if result_dict is not None:
+        return result_dict
+
+    result_dict = None
+    if settings.FACET_ENGINE_ENABLED:
+        try:
+            result_dict = await facet_index.fetch(
+                session, selected_values, current_step_number
+            )
+        except Exception as e:
+            logger.error(
+                f"Ошибка индекса фасетов, выполняем запрос к базе: {e}"
+            )
+    if result_dict is None:
+        result_dict = await fetch_step_from_db(
+            session, selected_values, current_step_number
+        )
+    step_cache.set(cache_key, result_dict)
+    return result_dict
+
+
+async def fetch_step_from_db(
+    session: AsyncSession,
+    selected_values: dict[int:list],
+    current_step_number: int,
+) -> dict:
+    """Выполняет запрос этапа отбора к базе данных."""
     current_step: int = FILTER_STEPS_DATA[current_step_number]
-    button_fields: list = current_step["button_fields"]
     # Генерация SQL-запроса
-    stmt = await get_sql_statment(
+    active_steps, params = get_sql_params(
         FILTER_STEPS_DATA, selected_values, current_step_number
     )
+    stmt = get_sql_statment(current_step_number, active_steps)
     try:
-        result = await session.execute(stmt)
+        result = await session.execute(stmt, params)
     except Exception as e:
         logger.error(f"Ошибка при выполнении запроса: {e}")
         raise
 
-    buttons: list = []
     rows: list = result.fetchall()
 
     if not rows:
@@ -61,50 +204,11 @@ async def fetch_data_from_db(
                 f"с выбранными значениями: {selected_values}"
             )
         )
-        return {
-            "message_text": (
-                "К сожалению, данные не найдены. "
-                "Попробуйте изменить критерии отбора."
-            ),
-            "buttons": [],
-        }
-    for row in rows:
-        button: dict = {}
-        if not current_step["by_range"]:
-            for digit in range(len(button_fields)):
-                button[button_fields[digit]] = row[digit]
-        else:
-            values_range: float = current_step["range"]
-            values_range_step: float = current_step["range_step"]
-            digits_after_dot: int = current_step["digits_after_dot"]
-            full_range: float = values_range + values_range_step
-
-            if row[0] is not None:
-                value_range_position: int = row[0] // full_range
-            else:
-                value_range_position = 0
-
-            range_result = " ".join(
-                (
-                    str(
-                        round(
-                            value_range_position * full_range, digits_after_dot
-                        )
-                    ),
-                    "-",
-                    str(value_range_position * full_range + values_range),
-                )
-            )
-
-            if range_result not in buttons:
-                for digit in range(len(button_fields)):
-                    button[button_fields[digit]] = range_result
-
-        buttons.append(button)
+        return {"message_text": DATA_NOT_FOUND_TEXT, "buttons": []}
 
     result_dict: dict = {
         "message_text": current_step["message_text"],
-        "buttons": buttons,
+        "buttons": get_buttons_from_rows(rows, current_step),
     }
 
     logger.info(
@@ -113,17 +217,206 @@ async def fetch_data_from_db(
     return result_dict
 
 
-async def get_sql_statment(
-    filter_data: dict, selected_values: list, current_step_number: int
+def get_buttons_from_rows(rows: list, current_step: dict) -> list[dict]:
+    """Формирует данные кнопок из строк результата запроса."""
+    button_fields: list = current_step["button_fields"]
+    buttons: list = []
+    for row in rows:
+        if current_step["by_range"]:
+            # База возвращает номер диапазона, подпись строится по нему
+            position = int(row[0])
+            row = [position, get_range_label(position, current_step)]
+        buttons.append(dict(zip(button_fields, row)))
+    return buttons
+
+
+def get_order_field(current_step: dict) -> ColumnElement:
+    """Возвращает поле, по которому сортируются элементы этапа."""
+    if current_step["by_range"]:
+        return get_range_bucket(current_step)
+    return current_step["order_fields"][0]
+
+
+async def fetch_page_from_db(
+    session: AsyncSession,
+    selected_values: dict[int:list],
+    current_step_number: int,
+    page_number: int = 0,
+    cursor: Any = None,
+) -> Page:
+    """
+    Возвращает одну страницу результата этапа отбора.
+
+    Страница выбирается в базе через LIMIT: по курсору (значению поля
+    сортировки последнего элемента предыдущей страницы), а если курсор
+    неизвестен - через OFFSET. Общее число элементов считается оконной
+    функцией в том же запросе. Если включен индекс фасетов, страница
+    вырезается из готового результата в памяти.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param selected_values: Словарь с выбранными значениями по этапам.
+    :param current_step_number: Номер текущего этапа.
+    :param page_number: Номер запрошенной страницы, начиная с нуля.
+    :param cursor: Значение поля сортировки, после которого начинается
+    страница.
+    """
+    cache_key = (
+        *get_cache_key(selected_values, current_step_number),
+        page_number,
+    )
+    page = step_cache.get(cache_key)
+    if page is not None:
+        return page
+
+    if settings.FACET_ENGINE_ENABLED:
+        result_dict = await fetch_data_from_db(
+            session, selected_values, current_step_number
+        )
+        page = get_page_from_result(result_dict, page_number)
+    else:
+        page = await fetch_page_by_query(
+            session, selected_values, current_step_number, page_number, cursor
+        )
+    step_cache.set(cache_key, page)
+    return page
+
+
+def get_page_from_result(result_dict: dict, page_number: int) -> Page:
+    """Вырезает страницу из полного результата этапа отбора."""
+    buttons: list = result_dict["buttons"]
+    if page_number * ITEMS_PER_PAGE >= len(buttons):
+        page_number = 0
+    start_index = page_number * ITEMS_PER_PAGE
+    end_index = start_index + ITEMS_PER_PAGE
+    return Page(
+        items=buttons[start_index:end_index],
+        number=page_number,
+        total=len(buttons),
+        message_text=result_dict["message_text"],
+    )
+
+
+async def fetch_page_by_query(
+    session: AsyncSession,
+    selected_values: dict[int:list],
+    current_step_number: int,
+    page_number: int,
+    cursor: Any = None,
+) -> Page:
+    """Выполняет запрос одной страницы этапа отбора к базе данных."""
+    current_step: dict = FILTER_STEPS_DATA[current_step_number]
+    active_steps, params = get_sql_params(
+        FILTER_STEPS_DATA, selected_values, current_step_number
+    )
+    by_cursor = cursor is not None and page_number > 0
+    if by_cursor:
+        params["cursor"] = cursor
+    else:
+        params["offset"] = page_number * ITEMS_PER_PAGE
+    stmt = get_page_sql_statment(current_step_number, active_steps, by_cursor)
+    try:
+        result = await session.execute(stmt, params)
+    except Exception as e:
+        logger.error(f"Ошибка при выполнении запроса: {e}")
+        raise
+    rows: list = result.fetchall()
+
+    if not rows:
+        if page_number > 0:
+            # Каталог мог измениться, возвращаемся на первую страницу
+            return await fetch_page_by_query(
+                session, selected_values, current_step_number, 0
+            )
+        logger.warning(
+            f"Данные не найдены на шаге {current_step_number} "
+            f"с выбранными значениями: {selected_values}"
+        )
+        return Page(
+            items=[], number=0, total=0, message_text=DATA_NOT_FOUND_TEXT
+        )
+
+    total: int = rows[0].total_count
+    if by_cursor:
+        # С курсором оконная функция считает только следующие элементы
+        total += page_number * ITEMS_PER_PAGE
+    page = Page(
+        items=get_buttons_from_rows([row[:-2] for row in rows], current_step),
+        number=page_number,
+        total=total,
+        message_text=current_step["message_text"],
+        cursor=rows[-1].order_key,
+    )
+    logger.info(
+        f"Страница {page_number} получена на шаге {current_step_number}: "
+        f"{page.items}"
+    )
+    return page
+
+
+def get_values_param_name(step_number: int) -> str:
+    """Возвращает имя параметра запроса с выбранными значениями этапа."""
+    return f"step_{step_number}_values"
+
+
+def get_sql_params(
+    filter_data: dict, selected_values: dict, current_step_number: int
+) -> tuple[tuple[int, ...], dict]:
+    """
+    Возвращает форму запроса и значения его параметров.
+
+    :param filter_data: Настройки этапов отбора.
+    :param selected_values: Словарь с выбранными значениями по этапам.
+    :param current_step_number: Номер текущего этапа.
+    :return: Номера предыдущих этапов, по которым выбраны значения,
+    и словарь параметров запроса.
+    """
+    active_steps: list = []
+    params: dict = {}
+    for step_number, filter_step in filter_data.items():
+        if step_number >= current_step_number:
+            break
+        values: list = selected_values.get(step_number)
+        if not values:
+            continue
+        if filter_step["by_range"]:
+            # Для диапазона кнопка передает его номер
+            values = [float(value) for value in values]
+        active_steps.append(step_number)
+        params[get_values_param_name(step_number)] = list(values)
+    return tuple(active_steps), params
+
+
+@lru_cache(maxsize=None)
+def get_sql_statment(
+    current_step_number: int, active_steps: tuple[int, ...]
 ) -> Select:
-    """Возвращает запрос к базе по настройкам отбора."""
-    current_step: int = filter_data[current_step_number]
+    """
+    Возвращает запрос к базе по настройкам отбора.
+
+    Запрос зависит только от этапа и набора этапов с выбранными
+    значениями, а сами значения передаются параметрами-массивами.
+    Поэтому запрос одной формы строится один раз, а SQLAlchemy
+    и asyncpg переиспользуют его компиляцию и подготовленный запрос.
+
+    :param current_step_number: Номер текущего этапа.
+    :param active_steps: Номера предыдущих этапов с выбранными значениями.
+    """
+    current_step: dict = FILTER_STEPS_DATA[current_step_number]
     query_fields: list = current_step["query_fields"]
     group_fields: list = current_step["group_fields"]
     order_fields: list = current_step["order_fields"]
     join_fields: list = current_step["join_fields"]
 
+    if current_step["by_range"]:
+        # Группировка по номеру диапазона, одна строка на диапазон
+        range_bucket = get_range_bucket(current_step)
+        query_fields = [range_bucket]
+        group_fields = [range_bucket]
+        order_fields = [range_bucket]
+
     stmt: Select = select(*query_fields)
+    if current_step["by_range"]:
+        stmt = stmt.where(current_step["where_field"].is_not(None))
 
     if group_fields:
         stmt = stmt.group_by(*group_fields)
@@ -132,40 +425,61 @@ async def get_sql_statment(
     if join_fields:
         stmt = stmt.join(*join_fields)
 
-    for step_number, filter_step in filter_data.items():
-        if step_number >= current_step_number:
-            break
-        values: list = selected_values.get(step_number)
-
-        if not values:
-            continue
-
-        if filter_step["join_fields"]:
-            stmt = stmt.join(*filter_step["join_fields"])
+    for step_number in active_steps:
+        filter_step: dict = FILTER_STEPS_DATA[step_number]
+        if filter_step["filter_join_fields"]:
+            stmt = stmt.join(*filter_step["filter_join_fields"])
 
-        stmt = await get_sql_statment_with_conditions(
-            stmt, filter_step, values
-        )
+        stmt = get_sql_statment_with_conditions(stmt, step_number, filter_step)
     return stmt
 
 
-async def get_sql_statment_with_conditions(
-    stmt: Select, filter_step: dict, values: list
+def get_sql_statment_with_conditions(
+    stmt: Select, step_number: int, filter_step: dict
 ) -> Select:
-    """Добавляет условия по настройкам этапа отбора."""
+    """
+    Добавляет условия по настройкам этапа отбора.
+
+    Выбранные значения сравниваются по id с внешним или первичным ключом
+    filter_field, поэтому условие использует индекс, а не сравнивает
+    названия.
+    """
+    param_name = get_values_param_name(step_number)
     if not filter_step["by_range"]:
         # Для полей, где не нужно учитывать диапазон значений
-        return stmt.where(filter_step["where_field"].in_(values))
-        # Если используется диапазон
+        filter_field = filter_step["filter_field"]
+        return stmt.where(
+            filter_field
+            == any_(bindparam(param_name, type_=ARRAY(filter_field.type)))
+        )
+    # Если используется диапазон, сравниваются номера диапазонов
+    return stmt.where(
+        get_range_bucket(filter_step)
+        == any_(bindparam(param_name, type_=ARRAY(Float)))
+    )
+
+
+@lru_cache(maxsize=None)
+def get_page_sql_statment(
+    current_step_number: int, active_steps: tuple[int, ...], by_cursor: bool
+) -> Select:
+    """
+    Возвращает запрос одной страницы этапа отбора.
+
+    :param current_step_number: Номер текущего этапа.
+    :param active_steps: Номера предыдущих этапов с выбранными значениями.
+    :param by_cursor: Выбирать страницу по курсору, а не через OFFSET.
+    """
+    current_step: dict = FILTER_STEPS_DATA[current_step_number]
+    order_field = get_order_field(current_step)
+    stmt = get_sql_statment(current_step_number, active_steps)
+    if by_cursor:
+        stmt = stmt.where(
+            order_field > bindparam("cursor", type_=order_field.type)
+        )
     else:
-        conditions: list = []
-        for value in values:
-            value_min, value_max = get_valid_min_max_from_range(value)
-            conditions.append(
-                filter_step["where_field"].between(
-                    float(value_min), float(value_max)
-                )
-            )
-        if conditions:
-            return stmt.where(or_(*conditions))
-    return stmt
+        stmt = stmt.offset(bindparam("offset", type_=Integer))
+    return stmt.add_columns(
+        order_field.label("order_key"),
+        func.count().over().label("total_count"),
+    ).limit(ITEMS_PER_PAGE)
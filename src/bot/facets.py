@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import time
+from typing import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.utils import get_range_label, get_range_position
+from bot.variables import DATA_NOT_FOUND_TEXT, FILTER_STEPS_DATA
+from db.catalog import get_catalog_version
+from db.config import settings
+from db.models import (
+    Brand,
+    Character,
+    Product,
+    ProductCharacterAssociation,
+    TypeProduct,
+)
+
+logger = logging.getLogger(__name__)
+
+# Поля продукта, которые нужны индексу для ответа на любой этап отбора
+PRODUCT_FIELDS = [
+    Product.id,
+    Product.model,
+    Product.description,
+    Product.pdf_url,
+    Product.image_url,
+    Product.power,
+    Product.typeproduct_id,
+    Product.brand_id,
+]
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Возвращает номера установленных битов по возрастанию."""
+    binary = bin(bits)[:1:-1]
+    position = binary.find("1")
+    while position != -1:
+        yield position
+        position = binary.find("1", position + 1)
+
+
+class FacetIndex:
+    """
+    Индекс каталога в памяти процесса для ответов на этапы отбора.
+
+    Для каждого id значения фильтра (тип продукции, характеристика, бренд,
+    номер диапазона мощности, модель) хранится битовое множество продуктов:
+    бит с номером i установлен, если продукт i обладает этим значением.
+    Продукты пронумерованы в порядке сортировки по модели, поэтому список
+    моделей получается обходом установленных битов по возрастанию.
+    """
+
+    def __init__(self):
+        """Инициализация."""
+        self.product_count: int = 0
+        # номер этапа -> значение фильтра -> битовое множество продуктов
+        self.step_bits: dict[int, dict] = {}
+        # номер этапа -> [(значения полей кнопки, битовое множество)]
+        self.step_rows: dict[int, list[tuple[tuple, int]]] = {}
+        # номер этапа -> значения полей кнопки по номеру продукта
+        self.product_rows: dict[int, list[tuple]] = {}
+        self.version: int | None = None
+        self.built_at: float = 0.0
+        self._lock = asyncio.Lock()
+
+    def is_stale(self) -> bool:
+        """Проверяет, нужно ли перестроить индекс."""
+        return (
+            self.version != get_catalog_version()
+            or time.monotonic() - self.built_at > settings.FACET_ENGINE_TTL
+        )
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """Перестраивает индекс, если каталог изменился."""
+        async with self._lock:
+            if not self.is_stale():
+                return
+            version = get_catalog_version()
+            started = time.perf_counter()
+            await self.build(session)
+            self.version = version
+            self.built_at = time.monotonic()
+            logger.info(
+                f"Индекс фасетов построен за "
+                f"{time.perf_counter() - started:.3f} с: "
+                f"{self.product_count} продуктов, версия каталога {version}"
+            )
+
+    async def build(self, session: AsyncSession) -> None:
+        """Загружает каталог из базы и строит битовые множества."""
+        products = (
+            (
+                await session.execute(
+                    select(*PRODUCT_FIELDS).order_by(Product.model)
+                )
+            )
+            .mappings()
+            .all()
+        )
+        positions = {row["id"]: number for number, row in enumerate(products)}
+        character_links = (
+            await session.execute(
+                select(
+                    ProductCharacterAssociation.product_id,
+                    ProductCharacterAssociation.character_id,
+                )
+            )
+        ).all()
+        # Связи продуктов со справочниками: (id продукта, id значения)
+        links = {
+            TypeProduct: [
+                (row["id"], row["typeproduct_id"]) for row in products
+            ],
+            Brand: [(row["id"], row["brand_id"]) for row in products],
+            Character: character_links,
+        }
+
+        step_bits, step_rows, product_rows = {}, {}, {}
+        for step_number, filter_step in FILTER_STEPS_DATA.items():
+            where_field = filter_step["where_field"]
+            if not filter_step["by_range"] and where_field.class_ is Product:
+                # Этап выбора модели: каждый продукт - отдельное значение
+                product_rows[step_number] = [
+                    tuple(
+                        row[field.key] for field in filter_step["query_fields"]
+                    )
+                    for row in products
+                ]
+                step_bits[step_number] = {
+                    row["id"]: 1 << number
+                    for number, row in enumerate(products)
+                }
+                continue
+            if filter_step["by_range"]:
+                rows = self.build_range_rows(products, filter_step)
+            else:
+                rows = await self.build_entity_rows(
+                    session,
+                    where_field.class_,
+                    links[where_field.class_],
+                    positions,
+                    filter_step,
+                )
+            id_index = filter_step["button_fields"].index("callback_data")
+            step_rows[step_number] = rows
+            step_bits[step_number] = {
+                values[id_index]: bits for values, bits in rows
+            }
+
+        self.product_count = len(products)
+        self.step_bits = step_bits
+        self.step_rows = step_rows
+        self.product_rows = product_rows
+
+    @staticmethod
+    async def build_entity_rows(
+        session: AsyncSession,
+        model,
+        links: list[tuple[int, int]],
+        positions: dict[int, int],
+        filter_step: dict,
+    ) -> list[tuple[tuple, int]]:
+        """Строит битовые множества для значений справочника."""
+        rows = (
+            await session.execute(
+                select(model.id, *filter_step["query_fields"]).order_by(
+                    *filter_step["order_fields"]
+                )
+            )
+        ).all()
+        bits_by_id = dict.fromkeys((row[0] for row in rows), 0)
+        for product_id, value_id in links:
+            if value_id in bits_by_id and product_id in positions:
+                bits_by_id[value_id] |= 1 << positions[product_id]
+        return [(tuple(row[1:]), bits_by_id[row[0]]) for row in rows]
+
+    @staticmethod
+    def build_range_rows(
+        products: list, filter_step: dict
+    ) -> list[tuple[tuple, int]]:
+        """Строит битовые множества для диапазонов значений."""
+        field_name = filter_step["where_field"].key
+        bits_by_position: dict[int, int] = {}
+        for number, row in enumerate(products):
+            if row[field_name] is None:
+                continue
+            position = get_range_position(row[field_name], filter_step)
+            bits_by_position[position] = bits_by_position.get(position, 0) | (
+                1 << number
+            )
+        return [
+            (
+                (position, get_range_label(position, filter_step)),
+                bits_by_position[position],
+            )
+            for position in sorted(bits_by_position)
+        ]
+
+    def get_selection_mask(
+        self, selected_values: dict[int, list], current_step_number: int
+    ) -> int:
+        """Возвращает множество продуктов, подходящих под выбор."""
+        mask = (1 << self.product_count) - 1
+        for step_number in FILTER_STEPS_DATA:
+            if step_number >= current_step_number:
+                break
+            values = selected_values.get(step_number)
+            if not values:
+                continue
+            bits = self.step_bits[step_number]
+            step_mask = 0
+            for value in values:
+                step_mask |= bits.get(value, 0)
+            mask &= step_mask
+        return mask
+
+    async def fetch(
+        self,
+        session: AsyncSession,
+        selected_values: dict[int, list],
+        current_step_number: int,
+    ) -> dict:
+        """
+        Возвращает результат этапа отбора в формате fetch_data_from_db.
+
+        :param session: Асинхронная сессия SQLAlchemy, используется только
+        для перестроения устаревшего индекса.
+        :param selected_values: Словарь с выбранными значениями по этапам.
+        :param current_step_number: Номер текущего этапа.
+        """
+        if self.is_stale():
+            await self.refresh(session)
+        current_step = FILTER_STEPS_DATA[current_step_number]
+        button_fields = current_step["button_fields"]
+        mask = self.get_selection_mask(selected_values, current_step_number)
+
+        if current_step_number in self.product_rows:
+            rows = self.product_rows[current_step_number]
+            buttons = [
+                dict(zip(button_fields, rows[position]))
+                for position in iter_bits(mask)
+            ]
+        else:
+            buttons = [
+                dict(zip(button_fields, values))
+                for values, bits in self.step_rows[current_step_number]
+                if bits & mask
+            ]
+
+        if not buttons:
+            logger.warning(
+                f"Данные не найдены в индексе на шаге {current_step_number} "
+                f"с выбранными значениями: {selected_values}"
+            )
+            return {"message_text": DATA_NOT_FOUND_TEXT, "buttons": []}
+        return {
+            "message_text": current_step["message_text"],
+            "buttons": buttons,
+        }
+
+
+facet_index = FacetIndex()
@@ -1,31 +1,45 @@
-import json
 import logging
 
 import telegram.error
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
 
-from bot.database import fetch_data_from_db
+from bot.database import fetch_page_from_db, get_product_detail
+from bot.keyboards import (
+    create_keyboard,
+    get_markup_fingerprint,
+    get_step_keyboard,
+)
 from bot.multiple_choice import (
     check_multi_dict,
-    get_multiple_elem_buttons,
-    get_next_step_button,
     get_selected_dict,
     get_selected_values,
     update_multiple_dict,
 )
 from bot.paginator import (
-    check_paginator,
-    check_string,
     create_paginator_dict,
     get_paginator_elements,
+    get_requested_page,
+)
+from bot.router import (
+    BACK,
+    MULTIPLE,
+    NEXT,
+    PREV,
+    STEP_FORWARD,
 )
 from bot.statistics_func import increment_view_stats
+from bot.telegram_files import DOCUMENT, PHOTO, send_product_file
 from bot.utils import clear_pagination_state, load_previous_state, save_state
 from bot.variables import (
+    ABOUT_SCREEN,
+    ABOUT_TEXT,
+    GREETING_SCREEN,
+    GREETING_TEXT,
+    MAIN_MENU_SCREEN,
+    MAIN_MENU_TEXT,
     MULTIPLE_STEP,
     MULTIPLE_STEP_HANDLER,
-    MULTIPLE_STEP_SELECTION_KEY,
     SELECT_BRAND,
     SELECT_CATEGORY,
     SELECT_MODEL,
@@ -34,53 +48,38 @@ from bot.variables import (
     SHOW_RESULT,
     STATE_NAMES,
 )
-from db.core import async_session_factory
 
 logger = logging.getLogger(__name__)
 
 
-def get_elem_buttons(session_key, current_elements):
-    """Создает кнопки без множественного выбора."""
-    return [
+def get_main_menu_markup() -> InlineKeyboardMarkup:
+    """Возвращает клавиатуру главного меню."""
+    return InlineKeyboardMarkup(
         [
-            InlineKeyboardButton(
-                str(elem["model"] if isinstance(elem, dict) else elem),
-                callback_data=(
-                    f"{session_key}_"
-                    f"{elem['model'] if isinstance(elem, dict) else elem}"
-                ),
-            )
+            [InlineKeyboardButton("О боте", callback_data="about")],
+            [
+                InlineKeyboardButton(
+                    "Выбрать категорию", callback_data="select-category"
+                )
+            ],
         ]
-        for elem in current_elements
-    ]
+    )
 
 
-def create_keyboard(
-    buttons: list[list[InlineKeyboardButton]],
-    paginator_buttons: list[list[InlineKeyboardButton]] = None,
-    add_navigation_buttons: bool = True,
-) -> InlineKeyboardMarkup:
+def render_screen(
+    screen: str | None,
+) -> tuple[str, InlineKeyboardMarkup, str | None]:
     """
-    Создает клавиатуру с кнопками и добавляет кнопки пагинации и навигации.
+    Строит статичный экран бота по его названию.
 
-    :param buttons: Список кнопок для клавиатуры.
-    :param paginator_buttons: Список кнопок пагинации, если есть.
-    :param add_navigation_buttons: Флаг, указывающий, нужно ли добавлять
-    кнопки "Назад" и "В начало".
-    :return: Объект InlineKeyboardMarkup с разметкой клавиатуры.
+    :param screen: Название экрана из записи истории.
+    :return: Текст сообщения, клавиатура и режим разметки текста.
     """
-    logger.info("Создание клавиатуры с кнопками и навигацией.")
-    keyboard = buttons if buttons else []
-    if paginator_buttons:
-        keyboard.extend([paginator_buttons])
-    if add_navigation_buttons:
-        keyboard.append(
-            [
-                InlineKeyboardButton("Назад", callback_data="back"),
-                InlineKeyboardButton("В начало", callback_data="start"),
-            ]
-        )
-    return InlineKeyboardMarkup(keyboard)
+    if screen == ABOUT_SCREEN:
+        return ABOUT_TEXT, create_keyboard([]), "Markdown"
+    if screen == MAIN_MENU_SCREEN:
+        return MAIN_MENU_TEXT, get_main_menu_markup(), None
+    return GREETING_TEXT, get_main_menu_markup(), None
 
 
 async def send_message(
@@ -113,17 +112,9 @@ async def send_message(
         )
 
 
-def serialize_reply_markup(reply_markup):
-    """Сериализует клавиатуру для точного сравнения."""
-    if reply_markup is None:
-        return None
-    return json.dumps(reply_markup.to_dict(), sort_keys=True)
-
-
 async def handle_selection(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
-    session_key: str,
     message_text: str,
     state: int,
     handler_name: str,
@@ -139,84 +130,69 @@ async def handle_selection(
     multiple_dict = context.chat_data.get("multiple", {})
     selected_dict = get_selected_dict(multiple_dict, state)
 
-    # Универсальная функция для всех хендлеров
-    async with async_session_factory() as session:
-        # Вызываем fetch_data_from_db напрямую и получаем результат
-        result = await fetch_data_from_db(
-            session, selected_dict, current_step_number
-        )
-        elements = result["buttons"]  # Извлекаем список кнопок
-        message_text = result["message_text"]  # Извлекаем текст сообщения
+    action = context.action
 
     # Блок пагинации
-    if (
-        not query.data.startswith("next_")
-        and not query.data.startswith("prev_")
-        and not query.data.startswith("multiple")
-    ):
+    if action.command not in (NEXT, PREV, MULTIPLE, BACK):
         clear_pagination_state(context)
     if "pagination" not in context.user_data:
         context.user_data["pagination"] = create_paginator_dict()
 
-    (current_elements, paginator_buttons, pagination_dict) = (
-        get_paginator_elements(
-            context.user_data["pagination"], state - 1, elements
-        )
+    page_number, cursor = get_requested_page(
+        context.user_data["pagination"], state - 1
+    )
+    # Универсальная функция для всех хендлеров, в том числе возврата
+    # назад: страница берется из кеша этапов, а при промахе из базы
+    # запрашивается только текущая страница
+    page = await fetch_page_from_db(
+        context.db_session,
+        selected_dict,
+        current_step_number,
+        page_number,
+        cursor,
+    )
+    message_text = page.message_text  # Извлекаем текст сообщения
+
+    (current_elements, pagination_dict) = get_paginator_elements(
+        context.user_data["pagination"],
+        state - 1,
+        page,
     )
     context.user_data["pagination"] = pagination_dict
     # Конец блока пагинации
-    # Обработка ответа кнопки выбора
-    callback_data = update.callback_query.data.split("_")
-    param = callback_data[-1]
-    command = callback_data[0]
-
-    # Обновляем multiple_dict, если нужно
-    if command not in ["back", "start"]:
-        if MULTIPLE_STEP[current_step_number]:
-            if (
-                command in MULTIPLE_STEP_SELECTION_KEY
-                and MULTIPLE_STEP_SELECTION_KEY[command] == current_step_number
-            ) or command == "multiple":
-                if (
-                    not check_paginator(update.callback_query.data)
-                    and len(callback_data) > 1
-                ):
-                    context.chat_data["multiple"] = update_multiple_dict(
-                        multiple_dict, current_step_number, param
-                    )
-
-    # Формирование новых кнопок
-    if MULTIPLE_STEP[current_step_number]:
-        # Формирование кнопок множественного выбора
-        element_buttons = get_multiple_elem_buttons(
-            multiple_dict,
-            session_key,
-            current_elements,
-            current_step_number,
+    # Обработка ответа кнопки выбора: обновляем multiple_dict, если нужно.
+    # Кнопки старых сообщений других этапов выбор текущего не меняют
+    if (
+        MULTIPLE_STEP[current_step_number]
+        and action.param is not None
+        and action.step == current_step_number
+    ):
+        context.chat_data["multiple"] = update_multiple_dict(
+            multiple_dict, current_step_number, action.param
         )
-        next_step_button = get_next_step_button()  # кнопка к следующему шагу
-        element_buttons.append(next_step_button)
-    else:
-        element_buttons = get_elem_buttons(session_key, current_elements)
 
-    # Создаем новую клавиатуру
-    new_reply_markup = create_keyboard(element_buttons, paginator_buttons)
+    # Клавиатура и ее отпечаток берутся из кеша клавиатур
+    new_reply_markup, new_fingerprint = get_step_keyboard(
+        current_step_number,
+        current_elements,
+        page.number,
+        page.total_pages,
+        multiple_dict,
+    )
 
     # Обновляем сообщение и клавиатуру
     current_message = query.message.text
-    current_reply_markup = serialize_reply_markup(query.message.reply_markup)
-    new_reply_markup_serialized = serialize_reply_markup(new_reply_markup)
+    current_fingerprint = get_markup_fingerprint(query.message.reply_markup)
 
     if (
         current_message != message_text
-        or current_reply_markup != new_reply_markup_serialized
+        or current_fingerprint != new_fingerprint
     ):
         save_state(
             context,
             state,
-            message_text,
-            new_reply_markup,
             handler_name=handler_name,
+            page=page.number,
         )
         try:
             await query.edit_message_text(
@@ -228,10 +204,10 @@ async def handle_selection(
     # Логика перехода между состояниями
     if (
         MULTIPLE_STEP[MULTIPLE_STEP_HANDLER[handler_name]]
-        or command == "multiple"
-    ) and command != "step-forward":
+        or action.command == MULTIPLE
+    ) and action.command != STEP_FORWARD:
         return state - 1
-    elif command == "step-forward":
+    elif action.command == STEP_FORWARD:
         if (
             not MULTIPLE_STEP[MULTIPLE_STEP_HANDLER[handler_name]]
             and MULTIPLE_STEP[MULTIPLE_STEP_HANDLER[handler_name] - 1]
@@ -271,23 +247,9 @@ async def start(
     context.chat_data["multiple"] = {}
 
     # Упрощаем сообщение для возврата в главное меню
-    greeting_text = (
-        "Вы вернулись в главное меню."
-        if return_to_main_menu
-        else "Добрый день! Введите ваш запрос или выберите действие "
-        "из предложенных кнопок."
-    )
-
-    main_menu_buttons = [
-        [InlineKeyboardButton("О боте", callback_data="about")],
-        [
-            InlineKeyboardButton(
-                "Выбрать категорию", callback_data="select-category"
-            )
-        ],
-    ]
-    reply_markup = InlineKeyboardMarkup(main_menu_buttons)
-    save_state(context, SELECT_CATEGORY, greeting_text, reply_markup)
+    screen = MAIN_MENU_SCREEN if return_to_main_menu else GREETING_SCREEN
+    greeting_text, reply_markup, _ = render_screen(screen)
+    save_state(context, SELECT_CATEGORY, screen=screen)
 
     await send_message(update, greeting_text, reply_markup)
     return SELECT_CATEGORY
@@ -313,25 +275,11 @@ async def show_about(
     query = update.callback_query
     await query.answer()
 
-    about_text = (
-        "Этот бот предназначен для помощи в выборе и покупке кондиционеров "
-        "и другой техники.\n"
-        "Вы можете использовать его для:\n\n"
-        "1. *Выбора категории товаров* - просто выберите "
-        "интересующую вас категорию.\n"
-        "2. *Подбора подходящего оборудования* - выберите тип и бренд, "
-        "чтобы найти оптимальные модели.\n"
-        "3. *Получения информации о моделях* - просмотрите краткое описание "
-        "и откройте подробные данные по каждой модели.\n\n"
-        "Используйте меню, чтобы начать или вернуться в главное меню "
-        "в любое время."
-    )
-
-    reply_markup = create_keyboard([])
-    save_state(context, SELECT_CATEGORY, about_text, reply_markup)
+    about_text, reply_markup, parse_mode = render_screen(ABOUT_SCREEN)
+    save_state(context, SELECT_CATEGORY, screen=ABOUT_SCREEN)
 
     await query.edit_message_text(
-        about_text, reply_markup=reply_markup, parse_mode="Markdown"
+        about_text, reply_markup=reply_markup, parse_mode=parse_mode
     )
     return SELECT_CATEGORY
 
@@ -357,7 +305,6 @@ async def select_category(
     return await handle_selection(
         update,
         context,
-        session_key="category",
         message_text="Выберите категорию",
         state=SELECT_TYPE,
         handler_name="select_category",
@@ -377,16 +324,15 @@ async def select_type(
     """
     user = update.callback_query.from_user
     multiple_dict = context.chat_data.get("multiple", {})
-    if update.callback_query.data == "back":
+    if context.action.command == BACK:
         selected_category = get_selected_values(multiple_dict.get(1, {}))
     else:
         # проверка что "не внутри пагинатора"
-        selected_category = check_string(
-            update.callback_query.data,
+        selected_category = context.action.get_selected_value(
             context.chat_data["multiple"].get("1", None),
         )
 
-    if update.callback_query.data != "back":
+    if context.action.command != BACK:
         if not check_multi_dict(multiple_dict, 1):
             context.chat_data["multiple"] = update_multiple_dict(
                 multiple_dict, 1, selected_category
@@ -399,7 +345,6 @@ async def select_type(
     return await handle_selection(
         update,
         context,
-        session_key="type",
         message_text="Выберите тип",
         state=SELECT_POWER,
         handler_name="select_type",
@@ -420,19 +365,16 @@ async def select_power(
     user = update.callback_query.from_user
     multiple_dict = context.chat_data.get("multiple", {})
     # проверка что "не внутри пагинатора"
-    if update.callback_query.data == "back":
+    if context.action.command == BACK:
         selected_type = get_selected_values(multiple_dict.get(2, {}))
     else:
-        selected_type = check_string(
-            update.callback_query.data,
-            get_selected_values(multiple_dict.get(2, {})),
-        )
+        selected_type = context.action.get_selected_value()
     logger.info(
         f"Пользователь {user.first_name} ({user.id}) "
         f"выбирает мощность для типа: {selected_type}"
     )
 
-    if update.callback_query.data != "back":
+    if context.action.command != BACK:
         if not check_multi_dict(multiple_dict, 2):
             context.chat_data["multiple"] = update_multiple_dict(
                 multiple_dict, 2, selected_type
@@ -444,7 +386,6 @@ async def select_power(
     return await handle_selection(
         update,
         context,
-        session_key="power",
         message_text="Выберите мощность",
         state=SELECT_BRAND,
         handler_name="select_power",
@@ -465,8 +406,7 @@ async def select_brand(
     user = update.callback_query.from_user
     multiple_dict = context.chat_data.get("multiple", {})
     # проверка что "не внутри пагинатора"
-    selected_power = check_string(
-        update.callback_query.data,
+    selected_power = context.action.get_selected_value(
         context.chat_data["multiple"].get("3", None),
     )
     logger.info(
@@ -481,7 +421,6 @@ async def select_brand(
     return await handle_selection(
         update,
         context,
-        session_key="brand",
         message_text="Выберите бренд",
         state=SELECT_MODEL,
         handler_name="select_brand",
@@ -502,8 +441,7 @@ async def select_model(
     user = update.callback_query.from_user
     multiple_dict = context.chat_data.get("multiple", {})
     # проверка что "не внутри пагинатора"
-    selected_brand = check_string(
-        update.callback_query.data,
+    selected_brand = context.action.get_selected_value(
         context.chat_data["multiple"].get("4", None),
     )
     logger.debug(f"Selected brand: {selected_brand}")
@@ -520,7 +458,6 @@ async def select_model(
     return await handle_selection(
         update,
         context,
-        session_key="model",
         message_text="Выберите модель",
         state=SHOW_RESULT,
         handler_name="select_model",
@@ -538,8 +475,7 @@ async def show_model_info(
     :return: Состояние SELECT_CATEGORY для возврата в меню категорий.
     """
     user = update.callback_query.from_user
-    model_id = check_string(
-        update.callback_query.data,
+    model_id = context.action.get_selected_value(
         context.user_data.get("selected_model", None),
     )
     logger.info(
@@ -547,27 +483,17 @@ async def show_model_info(
         f"информацию о модели {model_id}"
     )
 
-    async with async_session_factory() as session:
-        # Собираем словарь с выбранными значениями по шагам
-        multiple_dict = context.chat_data.get("multiple", {})
-        selected_dict = get_selected_dict(multiple_dict, 5)
-
-        try:
-            # Получаем данные о модели с помощью функции fetch_data_from_db
-            # Шаг 5 — выбор модели
-            result = await fetch_data_from_db(session, selected_dict, 5)
-        except ValueError as e:
-            logger.error(f"Ошибка при получении данных о модели: {e}")
-            await update.callback_query.edit_message_text(
-                "Произошла ошибка при получении данных о модели."
-            )
-            return SELECT_CATEGORY
-
-        models = result["buttons"]  # Список моделей
-
-    selected_model = next(
-        (model for model in models if model["label"] == model_id), None
-    )
+    try:
+        product_id = int(model_id)
+    except (TypeError, ValueError):
+        product_id = None
+
+    selected_model = None
+    if product_id is not None:
+        # Получаем карточку модели по первичному ключу
+        selected_model = await get_product_detail(
+            context.db_session, product_id
+        )
 
     # Проверка, что модель найдена
     if not selected_model:
@@ -582,13 +508,12 @@ async def show_model_info(
 
     # Формируем текст сообщения с информацией о модели
     text = (
-        f'Название: {selected_model["label"]}\n'
+        f'Название: {selected_model["model"]}\n'
         f'Описание: {selected_model["description"]}\n\n'
         f"Спасибо за использование бота!"
     )
     # Увеличиваем счетчик статистики (просмотров)
-    async with async_session_factory() as session:
-        await increment_view_stats(session, selected_model["callback_data"])
+    increment_view_stats(selected_model["model_id"])
 
     # Получаем ссылку на изображение из БД
     image_url = selected_model.get("image_url")
@@ -603,9 +528,13 @@ async def show_model_info(
 
     # Отправляем изображение модели, если есть URL
     try:
-        await context.bot.send_photo(
-            chat_id=update.effective_chat.id,
-            photo=image_url,
+        await send_product_file(
+            context.db_session,
+            context.bot.send_photo,
+            update.effective_chat.id,
+            selected_model["model_id"],
+            PHOTO,
+            image_url,
             caption=text,
             reply_markup=reply_markup,
         )
@@ -617,21 +546,24 @@ async def show_model_info(
             reply_markup=reply_markup,
         )
 
-    # Отправляем второе сообщение с кнопками "О боте" и "Выбрать категорию"
-    main_menu_buttons = [
-        [InlineKeyboardButton("О боте", callback_data="about")],
-        [
-            InlineKeyboardButton(
-                "Выбрать категорию", callback_data="select-category"
-            )
-        ],
-    ]
-    reply_markup_main_menu = InlineKeyboardMarkup(main_menu_buttons)
+    # Отправляем PDF модели документом
+    try:
+        await send_product_file(
+            context.db_session,
+            context.bot.send_document,
+            update.effective_chat.id,
+            selected_model["model_id"],
+            DOCUMENT,
+            selected_model["pdf_url"],
+        )
+    except Exception as e:
+        logger.error(f"Ошибка при отправке PDF: {e}")
 
+    # Отправляем второе сообщение с кнопками "О боте" и "Выбрать категорию"
     await context.bot.send_message(
         chat_id=update.effective_chat.id,
-        text="Вы вернулись в главное меню.",
-        reply_markup=reply_markup_main_menu,
+        text=MAIN_MENU_TEXT,
+        reply_markup=get_main_menu_markup(),
     )
 
     return SELECT_CATEGORY
@@ -661,25 +593,26 @@ async def handle_back(
         # Очищаем состояние пагинации
         clear_pagination_state(context)
 
-        # Восстанавливаем параметр пагинации
+        # Восстанавливаем параметр пагинации и страницу
         context.user_data["pagination"] = create_paginator_dict()
         (context.user_data["pagination"]["name_parameter"]) = (
             previous_state.get("handler_name")
         )
-        # Возвращаем состояние множественного выбора к предыдущему шагу
-        if "multiple" in previous_state:
-            context.chat_data["multiple"] = previous_state["multiple"]
-
+        context.user_data["pagination"]["current_page"] = previous_state.get(
+            "page", 0
+        )
         handler_name = previous_state.get("handler_name")
 
         # Возвращаем пользователю предыдущее сообщение и клавиатуру
         if handler_name:
             return await PAGINATION_HANDLER[handler_name](update, context)
         else:
-            # Если handler_name не найден, просто возвращаем состояние
+            # Если handler_name не найден, строим статичный экран заново
+            text, reply_markup, parse_mode = render_screen(
+                previous_state.get("screen")
+            )
             await update.callback_query.edit_message_text(
-                previous_state["message_text"],
-                reply_markup=previous_state["reply_markup"],
+                text, reply_markup=reply_markup, parse_mode=parse_mode
             )
             return previous_state["state"]
 
@@ -750,9 +683,9 @@ async def handle_pagination(
     current_page = context.user_data["pagination"].get("current_page", 0)
     name_parameter = context.user_data["pagination"].get("name_parameter")
 
-    if "prev_" in query.data:
+    if context.action.command == PREV:
         current_page = max(0, current_page - 1)
-    elif "next_" in query.data:
+    elif context.action.command == NEXT:
         current_page += 1
 
     # Сохраняем новую страницу в состоянии пагинации
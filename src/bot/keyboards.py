@@ -0,0 +1,149 @@
+import logging
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot.multiple_choice import get_multiple_elem_buttons, get_next_step_button
+from bot.paginator import get_paginator_buttons
+from bot.router import SELECT_CODE, encode_callback_data
+from bot.variables import MULTIPLE_STEP
+from db.cache import TTLCache
+from db.catalog import get_catalog_version
+from db.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Кеш клавиатур этапов: (версия каталога, этап, страница, элементы,
+# отметки) -> (клавиатура, отпечаток)
+keyboard_cache = TTLCache("клавиатур", settings.KEYBOARD_CACHE_SIZE)
+
+
+def get_elem_buttons(current_step_number, current_elements):
+    """Создает кнопки без множественного выбора, передающие id значений."""
+    return [
+        [
+            InlineKeyboardButton(
+                elem["label"],
+                callback_data=encode_callback_data(
+                    SELECT_CODE, current_step_number, elem["id"]
+                ),
+            )
+        ]
+        for elem in current_elements
+    ]
+
+
+def create_keyboard(
+    buttons: list[list[InlineKeyboardButton]],
+    paginator_buttons: list[list[InlineKeyboardButton]] = None,
+    add_navigation_buttons: bool = True,
+) -> InlineKeyboardMarkup:
+    """
+    Создает клавиатуру с кнопками и добавляет кнопки пагинации и навигации.
+
+    :param buttons: Список кнопок для клавиатуры.
+    :param paginator_buttons: Список кнопок пагинации, если есть.
+    :param add_navigation_buttons: Флаг, указывающий, нужно ли добавлять
+    кнопки "Назад" и "В начало".
+    :return: Объект InlineKeyboardMarkup с разметкой клавиатуры.
+    """
+    logger.info("Создание клавиатуры с кнопками и навигацией.")
+    keyboard = buttons if buttons else []
+    if paginator_buttons:
+        keyboard.extend([paginator_buttons])
+    if add_navigation_buttons:
+        keyboard.append(
+            [
+                InlineKeyboardButton("Назад", callback_data="back"),
+                InlineKeyboardButton("В начало", callback_data="start"),
+            ]
+        )
+    return InlineKeyboardMarkup(keyboard)
+
+
+def get_markup_fingerprint(
+    reply_markup: InlineKeyboardMarkup | None,
+) -> tuple | None:
+    """
+    Возвращает отпечаток клавиатуры для сравнения.
+
+    Отпечаток состоит из текста, callback_data и ссылки каждой кнопки,
+    этого достаточно, чтобы понять, нужно ли редактировать сообщение.
+    """
+    if reply_markup is None:
+        return None
+    return tuple(
+        tuple(
+            (button.text, button.callback_data, button.url) for button in row
+        )
+        for row in reply_markup.inline_keyboard
+    )
+
+
+def get_selection_bitmap(
+    multiple_dict: dict[int, dict[int, bool]],
+    current_step_number: int,
+    current_elements: list[dict],
+) -> int:
+    """Возвращает битовую маску отмеченных элементов страницы."""
+    selected = multiple_dict.get(current_step_number, {})
+    bitmap = 0
+    for position, elem in enumerate(current_elements):
+        if selected.get(elem["id"]):
+            bitmap |= 1 << position
+    return bitmap
+
+
+def get_step_keyboard(
+    current_step_number: int,
+    current_elements: list[dict],
+    page_number: int,
+    total_pages: int,
+    multiple_dict: dict[int, dict[int, bool]],
+) -> tuple[InlineKeyboardMarkup, tuple]:
+    """
+    Возвращает клавиатуру страницы этапа отбора и ее отпечаток.
+
+    Клавиатура строится один раз для сочетания этапа, страницы, ее
+    элементов и отмеченных на ней значений, дальше берется из кеша.
+
+    :param current_step_number: Номер текущего этапа.
+    :param current_elements: Элементы текущей страницы.
+    :param page_number: Номер страницы, начиная с нуля.
+    :param total_pages: Общее число страниц.
+    :param multiple_dict: Словарь множественного выбора.
+    """
+    multiple = MULTIPLE_STEP[current_step_number]
+    cache_key = (
+        get_catalog_version(),
+        current_step_number,
+        page_number,
+        total_pages,
+        tuple((elem["id"], elem["label"]) for elem in current_elements),
+        (
+            get_selection_bitmap(
+                multiple_dict, current_step_number, current_elements
+            )
+            if multiple
+            else 0
+        ),
+    )
+    cached = keyboard_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if multiple:
+        # Формирование кнопок множественного выбора
+        element_buttons = get_multiple_elem_buttons(
+            multiple_dict, current_elements, current_step_number
+        )
+        element_buttons.append(get_next_step_button())
+    else:
+        element_buttons = get_elem_buttons(
+            current_step_number, current_elements
+        )
+    reply_markup = create_keyboard(
+        element_buttons, get_paginator_buttons(page_number, total_pages)
+    )
+    result = (reply_markup, get_markup_fingerprint(reply_markup))
+    keyboard_cache.set(cache_key, result)
+    return result
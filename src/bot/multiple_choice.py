@@ -1,5 +1,7 @@
 from telegram import InlineKeyboardButton
 
+from bot.router import MULTIPLE_CODE, STEP_FORWARD, encode_callback_data
+
 
 def clear_multiple_dict(
     multiple_dict: dict[int, dict[str, bool]], state: int
@@ -32,11 +34,11 @@ def get_selected_dict(
 
 
 def update_multiple_dict(
-    multiple_dict: dict[int, dict[str, bool]], state: int, param: str = None
-) -> dict[int, dict[str, bool]]:
+    multiple_dict: dict[int, dict[int, bool]], state: int, param: int = None
+) -> dict[int, dict[int, bool]]:
     """Обновляет словарь множественного выбора."""
     multiple_dict[state] = multiple_dict.get(state, {})
-    if param:
+    if param is not None:
         multiple_dict[state][param] = not multiple_dict[state].get(
             param, False
         )
@@ -52,39 +54,29 @@ def check_multi_dict(
     return param in multiple_dict
 
 
-def check_elem_not_dict(elem) -> str:
-    """Возвращает значение по ключу если словарь."""
-    return str(elem["label"] if isinstance(elem, dict) else elem)
-
-
 def check_marked_button(
-    elem: str, m_dict: dict[int, dict[str, bool]], state: int
+    elem: dict, m_dict: dict[int, dict[int, bool]], state: int
 ) -> str:
     """Формирует отметку на кнопке мн.выбора."""
     if state in m_dict:
         params = m_dict[state]
-        return (
-            f"{'✅ ' if (elem in params and params[elem]) else ''}" f"{elem}"
-        )
+        return f"{'✅ ' if params.get(elem['id']) else ''}" f"{elem['label']}"
     else:
-        return f"{elem}"
+        return f"{elem['label']}"
 
 
 def get_multiple_elem_buttons(
-    multiple_dict: dict[int, dict[str, bool]],
-    session_key: str,
-    current_elements: list,
+    multiple_dict: dict[int, dict[int, bool]],
+    current_elements: list[dict],
     state: int,
 ) -> list[InlineKeyboardButton]:
     """Формирует кнопки мн.выбора."""
     return [
         [
             InlineKeyboardButton(
-                check_marked_button(
-                    check_elem_not_dict(elem), multiple_dict, state
-                ),
-                callback_data=(
-                    f"multiple_{session_key}_" f"{check_elem_not_dict(elem)}"
+                check_marked_button(elem, multiple_dict, state),
+                callback_data=encode_callback_data(
+                    MULTIPLE_CODE, state, elem["id"]
                 ),
             )
         ]
@@ -96,6 +88,6 @@ def get_next_step_button() -> list[InlineKeyboardButton]:
     """Формирует кнопку перехода к следующему шагу."""
     return [
         InlineKeyboardButton(
-            "Применить выбор и перейти далее", callback_data=("step-forward")
+            "Применить выбор и перейти далее", callback_data=(STEP_FORWARD)
         ),
     ]
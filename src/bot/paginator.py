@@ -1,8 +1,9 @@
-import re
+from typing import Any
 
 from telegram import InlineKeyboardButton
 
-from bot.variables import HANDLE_PAGINATOR_PATTERN, ITEMS_PER_PAGE, STATE_NAMES
+from bot.database import Page
+from bot.variables import STATE_NAMES
 
 
 # Функция для получения названия по номеру
@@ -13,27 +14,22 @@ def get_state_name(state_number: int) -> str:
     return "Неизвестное состояние"
 
 
-def get_total_pages(list_total_elements: list) -> int:
-    """Возвращает общее число страниц пагинации."""
-    return (len(list_total_elements) + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
+def get_list_values_from_list_dicts(list: list) -> list[dict]:
+    """
+    Возвращает список значений из списка словарей.
 
-
-def get_list_values_from_list_dicts(list: list) -> list:
-    """Возвращает список значений из списка словарей."""
+    :param list: Список словарей с кнопками этапа.
+    :return: Словари с id значения и подписью кнопки.
+    """
     list_values = []
     for dict in list:
         if dict["label"]:
-            list_values.append(dict["label"])
+            list_values.append(
+                {"id": dict["callback_data"], "label": str(dict["label"])}
+            )
     return list_values
 
 
-def get_current_elements(page: int, list_total_elements: list) -> list:
-    """Возвращает список элементов для текущей страницы пагинации."""
-    start_index = page * ITEMS_PER_PAGE
-    end_index = min(start_index + ITEMS_PER_PAGE, len(list_total_elements))
-    return list_total_elements[start_index:end_index]
-
-
 def get_paginator_buttons(page: int, total_pages: int) -> list:
     """Возвращает кнопки пагинации для запрошенного параметра."""
     paginator_buttons = []
@@ -62,23 +58,14 @@ def get_paginator_buttons(page: int, total_pages: int) -> list:
     return paginator_buttons
 
 
-def check_string(input_string: str, selected_param_name: str = None) -> str:
-    """Проверяет, находится ли пользователь внутри пагинатора/мн.выбора."""
-    if (
-        not re.match(HANDLE_PAGINATOR_PATTERN, input_string)
-        and (not re.match(r"^multiple", input_string))
-        and (not re.match(r"^step-forward", input_string))
-    ):
-        return input_string.split("_")[-1]
-
-    return selected_param_name
-
-
 def create_paginator_dict() -> dict:
     """Создает словарь для пагинации."""
     return {
         "current_page": 0,
         "name_parameter": None,
+        # Курсоры страниц: номер страницы -> ключ сортировки, после которого
+        # она начинается
+        "cursors": {},
     }
 
 
@@ -99,33 +86,35 @@ def update_paginator_dict(state: int) -> dict:
     return {
         "current_page": 0,
         "name_parameter": get_state_name(state),
+        "cursors": {},
     }
 
 
-def get_paginator_elements(
-    pagination_dict, state, list_elements
-) -> tuple[list, list, dict]:
-    """Формирует данные для пагинации: элементы, кнопки и словарь контекста."""
-    list_total_elements = get_list_values_from_list_dicts(list_elements)
+def get_requested_page(pagination_dict: dict, state: int) -> tuple[int, Any]:
+    """Возвращает номер запрошенной страницы и ее курсор, если он известен."""
     func_name = get_state_name(state)
     current_page = get_current_page_check(
         pagination_dict["name_parameter"],
         func_name,
         pagination_dict["current_page"],
     )
-    current_elements = get_current_elements(current_page, list_total_elements)
-
-    pagination_dict["name_parameter"] = func_name
-    pagination_dict["current_page"] = current_page
+    if pagination_dict["name_parameter"] != func_name:
+        return current_page, None
+    return current_page, pagination_dict.get("cursors", {}).get(current_page)
 
-    paginator_buttons = get_paginator_buttons(
-        current_page,
-        get_total_pages(list_total_elements),
-    )
 
-    return current_elements, paginator_buttons, pagination_dict
+def get_paginator_elements(
+    pagination_dict: dict, state: int, page: Page
+) -> tuple[list[dict], dict]:
+    """Формирует данные для пагинации: элементы и словарь контекста."""
+    current_elements = get_list_values_from_list_dicts(page.items)
+    func_name = get_state_name(state)
+    if pagination_dict["name_parameter"] != func_name:
+        pagination_dict["cursors"] = {}
 
+    pagination_dict["name_parameter"] = func_name
+    pagination_dict["current_page"] = page.number
+    # Запоминаем курсор следующей страницы для перехода по ключу
+    pagination_dict.setdefault("cursors", {})[page.number + 1] = page.cursor
 
-def check_paginator(input_string: str) -> bool:
-    """Сверяет строку с шаблоном пагинатора."""
-    return re.match(HANDLE_PAGINATOR_PATTERN, input_string)
+    return current_elements, pagination_dict
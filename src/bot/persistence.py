@@ -0,0 +1,261 @@
+import asyncio
+import json
+import logging
+import pickle
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from telegram.ext import BasePersistence, PersistenceInput, PicklePersistence
+
+from db.config import BASE_DIR, settings
+from db.core import async_session_factory
+from db.models import BotState
+
+logger = logging.getLogger(__name__)
+
+# Виды сохраняемых данных
+USER_DATA = "user"
+CHAT_DATA = "chat"
+CONVERSATION = "conversation"
+
+
+class PostgresPersistence(BasePersistence[dict, dict, dict]):
+    """
+    Хранилище состояния диалогов бота в таблице bot_state.
+
+    Данные пользователя и чата загружаются из базы при первом обращении
+    к ним, а не все сразу при запуске. Изменения, которые Application
+    передает раз в update_interval секунд, копятся в памяти
+    и записываются в базу одним пакетом.
+    """
+
+    def __init__(self, update_interval: float = 60):
+        """
+        Инициализация.
+
+        :param update_interval: Интервал сохранения изменений в секундах.
+        """
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, callback_data=False),
+            update_interval=update_interval,
+        )
+        # (вид, ключ) -> данные для записи или None для удаления
+        self._pending: dict[tuple[str, str], bytes | None] = {}
+        # Загруженные из базы данные пользователей и чатов, самые давние
+        # вытесняются первыми и при обращении загружаются снова
+        self._loaded: OrderedDict[tuple[str, str], None] = OrderedDict()
+        self._flush_task: asyncio.Task | None = None
+        self._flush_scheduled = False
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def get_conversation_key(name: str, key: tuple) -> str:
+        """Возвращает ключ записи состояния диалога."""
+        return json.dumps([name, *key])
+
+    async def get_user_data(self) -> dict[int, dict]:
+        """Данные пользователей загружаются лениво в refresh_user_data."""
+        return {}
+
+    async def get_chat_data(self) -> dict[int, dict]:
+        """Данные чатов загружаются лениво в refresh_chat_data."""
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        """Данные бота не сохраняются."""
+        return {}
+
+    async def get_callback_data(self) -> None:
+        """Данные callback не сохраняются."""
+
+    async def get_conversations(self, name: str) -> dict[tuple, object]:
+        """Возвращает состояния всех сохраненных диалогов с именем name."""
+        async with async_session_factory() as session:
+            rows = (
+                await session.execute(
+                    select(BotState.key, BotState.data).where(
+                        BotState.kind == CONVERSATION
+                    )
+                )
+            ).all()
+        conversations = {}
+        for key, data in rows:
+            conversation_name, *conversation_key = json.loads(key)
+            if conversation_name == name:
+                conversations[tuple(conversation_key)] = pickle.loads(data)
+        return conversations
+
+    async def update_conversation(
+        self, name: str, key: tuple, new_state: object | None
+    ) -> None:
+        """Отмечает изменение состояния диалога."""
+        self.mark_dirty(
+            CONVERSATION, self.get_conversation_key(name, key), new_state
+        )
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        """Отмечает изменение данных пользователя."""
+        self.mark_dirty(USER_DATA, str(user_id), data)
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        """Отмечает изменение данных чата."""
+        self.mark_dirty(CHAT_DATA, str(chat_id), data)
+
+    async def update_bot_data(self, data: dict) -> None:
+        """Данные бота не сохраняются."""
+
+    async def update_callback_data(self, data: Any) -> None:
+        """Данные callback не сохраняются."""
+
+    async def drop_user_data(self, user_id: int) -> None:
+        """Отмечает удаление данных пользователя."""
+        self.mark_dirty(USER_DATA, str(user_id), None)
+        self._loaded.pop((USER_DATA, str(user_id)), None)
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        """Отмечает удаление данных чата."""
+        self.mark_dirty(CHAT_DATA, str(chat_id), None)
+        self._loaded.pop((CHAT_DATA, str(chat_id)), None)
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        """Загружает данные пользователя при первом обращении."""
+        await self.load_once(USER_DATA, str(user_id), user_data)
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        """Загружает данные чата при первом обращении."""
+        await self.load_once(CHAT_DATA, str(chat_id), chat_data)
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        """Данные бота не сохраняются."""
+
+    async def flush(self) -> None:
+        """Записывает все накопленные изменения при остановке бота."""
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.write_pending()
+
+    async def load_once(self, kind: str, key: str, data: dict) -> None:
+        """
+        Загружает сохраненные данные в словарь при первом обращении.
+
+        :param kind: Вид данных.
+        :param key: Идентификатор пользователя или чата.
+        :param data: Словарь данных, который заполняется на месте.
+        """
+        if (kind, key) in self._loaded:
+            self._loaded.move_to_end((kind, key))
+            return
+        if data or (kind, key) in self._pending:
+            # Данные уже появились в памяти, они новее сохраненных
+            self.mark_loaded(kind, key)
+            return
+        async with async_session_factory() as session:
+            stored = (
+                await session.execute(
+                    select(BotState.data).where(
+                        BotState.kind == kind, BotState.key == key
+                    )
+                )
+            ).scalar_one_or_none()
+        if stored is not None:
+            data.update(pickle.loads(stored))
+        # Отмечаем только после успешного чтения: при ошибке данные
+        # загрузятся при следующем обращении, а пустой словарь
+        # не перезапишет сохраненные
+        self.mark_loaded(kind, key)
+
+    def mark_loaded(self, kind: str, key: str) -> None:
+        """Запоминает, что данные загружены, вытесняя самые давние."""
+        self._loaded[(kind, key)] = None
+        self._loaded.move_to_end((kind, key))
+        while len(self._loaded) > settings.BOT_PERSISTENCE_LOADED_SIZE:
+            self._loaded.popitem(last=False)
+
+    def mark_dirty(self, kind: str, key: str, data: object | None) -> None:
+        """
+        Ставит изменение в очередь на запись.
+
+        Application вызывает методы update_* для всех изменений разом,
+        поэтому запись откладывается до конца текущей итерации цикла
+        событий и выполняется одним пакетом.
+        """
+        self._pending[(kind, key)] = (
+            None if data is None else pickle.dumps(data)
+        )
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._flush_task = asyncio.create_task(self.flush_soon())
+
+    async def flush_soon(self) -> None:
+        """Записывает накопленные изменения после текущей пачки."""
+        self._flush_scheduled = False
+        await self.write_pending()
+
+    async def write_pending(self) -> None:
+        """Записывает накопленные изменения в базу одним пакетом."""
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            upserts = [
+                {"kind": kind, "key": key, "data": data}
+                for (kind, key), data in pending.items()
+                if data is not None
+            ]
+            deletes = [
+                (kind, key)
+                for (kind, key), data in pending.items()
+                if data is None
+            ]
+            try:
+                async with async_session_factory() as session:
+                    if upserts:
+                        stmt = insert(BotState).values(upserts)
+                        await session.execute(
+                            stmt.on_conflict_do_update(
+                                constraint="idx_unique_bot_state",
+                                set_={
+                                    "data": stmt.excluded.data,
+                                    "updated_at": func.timezone(
+                                        "utc", func.now()
+                                    ),
+                                },
+                            )
+                        )
+                    if deletes:
+                        await session.execute(
+                            delete(BotState).where(
+                                tuple_(BotState.kind, BotState.key).in_(
+                                    deletes
+                                )
+                            )
+                        )
+                    await session.commit()
+            except Exception as e:
+                # Возвращаем изменения, которые не были перезаписаны новыми
+                for item_key, data in pending.items():
+                    self._pending.setdefault(item_key, data)
+                logger.error(f"Ошибка при сохранении состояния бота: {e}")
+                return
+        logger.info(
+            f"Сохранено состояние бота: {len(upserts)} записей, "
+            f"удалено {len(deletes)}."
+        )
+
+
+def get_persistence() -> BasePersistence | None:
+    """Возвращает хранилище состояния бота по настройке BOT_PERSISTENCE."""
+    if settings.BOT_PERSISTENCE == "postgres":
+        return PostgresPersistence(
+            update_interval=settings.BOT_PERSISTENCE_INTERVAL
+        )
+    if settings.BOT_PERSISTENCE == "file":
+        # Локальный файл для разработки
+        return PicklePersistence(
+            filepath=BASE_DIR / "bot_state.pickle",
+            store_data=PersistenceInput(bot_data=False, callback_data=False),
+            update_interval=settings.BOT_PERSISTENCE_INTERVAL,
+        )
+    return None
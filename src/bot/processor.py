@@ -0,0 +1,97 @@
+import logging
+from collections import deque
+from typing import Any, Coroutine
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class ChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Обработчик обновлений, параллельный между чатами.
+
+    Обновления разных чатов обрабатываются одновременно, а обновления
+    одного чата - строго по очереди, в порядке поступления. Пока чат
+    занят, его новые обновления ставятся в очередь чата и выполняются
+    той же задачей, поэтому частые нажатия в одном чате не занимают
+    места остальных чатов в лимите max_concurrent_updates.
+
+    Application отмечает обновление обработанным, как только оно
+    поставлено в очередь чата, поэтому такие обновления учитываются
+    отдельно в pending, пока их обработка не завершится.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        """
+        Инициализация.
+
+        :param max_concurrent_updates: Число чатов, обновления которых
+        обрабатываются одновременно.
+        """
+        super().__init__(max_concurrent_updates)
+        # id чата -> очередь обновлений, ожидающих обработки
+        self._queues: dict[int, deque[Coroutine[Any, Any, Any]]] = {}
+        # Обновления, поставленные в очереди чатов и еще не обработанные
+        self.pending = 0
+
+    @staticmethod
+    def get_chat_key(update: object) -> int | None:
+        """Возвращает id чата или пользователя, от которого обновление."""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+        if update.effective_user is not None:
+            return update.effective_user.id
+        return None
+
+    async def do_process_update(
+        self, update: object, coroutine: Coroutine[Any, Any, Any]
+    ) -> None:
+        """Обрабатывает обновление после предыдущих обновлений чата."""
+        chat_key = self.get_chat_key(update)
+        if chat_key is None:
+            await coroutine
+            return
+
+        queue = self._queues.get(chat_key)
+        if queue is not None:
+            # Чат уже обрабатывается, обновление выполнит та же задача
+            queue.append(coroutine)
+            self.pending += 1
+            return
+
+        queue = self._queues[chat_key] = deque()
+        try:
+            await self.run_update(chat_key, coroutine)
+            while queue:
+                try:
+                    await self.run_update(chat_key, queue.popleft())
+                finally:
+                    self.pending -= 1
+        finally:
+            # При отмене задачи закрываем обновления, которые не успели
+            # обработать
+            for pending in self._queues.pop(chat_key):
+                pending.close()
+                self.pending -= 1
+
+    @staticmethod
+    async def run_update(
+        chat_key: int, coroutine: Coroutine[Any, Any, Any]
+    ) -> None:
+        """Обрабатывает обновление чата, записывая ошибку в лог."""
+        try:
+            await coroutine
+        except Exception as e:
+            logger.error(
+                f"Ошибка при обработке обновления чата {chat_key}: {e}"
+            )
+
+    async def initialize(self) -> None:
+        """Дополнительная инициализация не требуется."""
+
+    async def shutdown(self) -> None:
+        """Дополнительное освобождение ресурсов не требуется."""
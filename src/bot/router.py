@@ -0,0 +1,168 @@
+import logging
+from functools import lru_cache
+from typing import Awaitable, Callable, NamedTuple
+
+from telegram import Update
+from telegram.ext import Application, BaseHandler
+
+from bot.context import BotContext
+from bot.variables import MULTIPLE_STEP_SELECTION_KEY
+
+logger = logging.getLogger(__name__)
+
+# Команды callback_data
+ABOUT = "about"
+BACK = "back"
+MULTIPLE = "multiple"
+NEXT = "next"
+NO_ANSWER = "no_answer"
+PREV = "prev"
+SELECT_CATEGORY_COMMAND = "select-category"
+START = "start"
+STEP_FORWARD = "step-forward"
+
+# Коды кнопок этапов отбора в callback_data: "<код><этап>:<id>"
+SELECT_CODE = "s"
+MULTIPLE_CODE = "m"
+# Команда кнопки выбора по номеру этапа: 1 -> "category"
+STEP_COMMANDS = {
+    step: command for command, step in MULTIPLE_STEP_SELECTION_KEY.items()
+}
+BASE36_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+# Команды без параметров
+SIMPLE_COMMANDS = frozenset(
+    (ABOUT, BACK, NO_ANSWER, SELECT_CATEGORY_COMMAND, START, STEP_FORWARD)
+)
+PAGINATION_COMMANDS = frozenset((PREV, NEXT))
+
+
+class CallbackAction(NamedTuple):
+    """
+    Разобранная callback_data кнопки.
+
+    :param command: Команда кнопки (back, next, multiple, category, ...).
+    :param step: Номер этапа отбора, к которому относится кнопка.
+    :param param: Параметр кнопки: номер страницы или id выбранного
+    значения.
+    """
+
+    command: str
+    step: int | None = None
+    param: int | None = None
+
+    def get_selected_value(self, default=None):
+        """
+        Возвращает значение, выбранное кнопкой этапа отбора.
+
+        Для кнопок пагинации, множественного выбора и навигации
+        возвращает default.
+        """
+        if self.command in MULTIPLE_STEP_SELECTION_KEY:
+            return self.param
+        return default
+
+
+def encode_id(value: int) -> str:
+    """Записывает целое число в системе счисления с основанием 36."""
+    if value < 0:
+        return "-" + encode_id(-value)
+    digits = ""
+    while True:
+        value, digit = divmod(value, 36)
+        digits = BASE36_DIGITS[digit] + digits
+        if not value:
+            return digits
+
+
+def encode_callback_data(code: str, step: int, value_id: int) -> str:
+    """
+    Возвращает callback_data кнопки значения этапа отбора.
+
+    Кнопка передает не подпись, а id значения, поэтому callback_data
+    короткая и укладывается в ограничение Telegram в 64 байта.
+
+    :param code: Код кнопки (SELECT_CODE или MULTIPLE_CODE).
+    :param step: Номер этапа отбора.
+    :param value_id: id значения или номер диапазона.
+    """
+    return f"{code}{step}:{encode_id(int(value_id))}"
+
+
+@lru_cache(maxsize=4096)
+def parse_callback_data(data: str) -> CallbackAction | None:
+    """
+    Разбирает callback_data в действие.
+
+    :param data: callback_data нажатой кнопки.
+    :return: Действие или None, если формат callback_data неизвестен.
+    """
+    if data in SIMPLE_COMMANDS:
+        return CallbackAction(data)
+    command, _, param = data.partition("_")
+    if command in PAGINATION_COMMANDS:
+        if not param.isdigit():
+            return None
+        return CallbackAction(command, param=int(param))
+    code, separator, value = data.partition(":")
+    if not separator or code[:1] not in (SELECT_CODE, MULTIPLE_CODE):
+        return None
+    try:
+        step = int(code[1:])
+        value_id = int(value, 36)
+    except ValueError:
+        return None
+    if step not in STEP_COMMANDS:
+        return None
+    if code[0] == MULTIPLE_CODE:
+        return CallbackAction(MULTIPLE, step, value_id)
+    return CallbackAction(STEP_COMMANDS[step], step, value_id)
+
+
+class CallbackRouter(BaseHandler[Update, BotContext]):
+    """
+    Обработчик нажатий кнопок одного состояния диалога.
+
+    Разбирает callback_data один раз, выбирает обработчик по команде
+    из таблицы маршрутов и передает ему действие в context.action.
+    """
+
+    def __init__(
+        self,
+        routes: dict[str, Callable[[Update, BotContext], Awaitable]],
+        block: bool = True,
+    ):
+        """
+        Инициализация.
+
+        :param routes: Таблица маршрутов: команда -> обработчик.
+        :param block: Ждать ли завершения обработчика.
+        """
+        super().__init__(self.dispatch, block=block)
+        self.routes = routes
+
+    def check_update(self, update: object) -> CallbackAction | None:
+        """Возвращает действие, если для его команды есть обработчик."""
+        if not isinstance(update, Update) or not update.callback_query:
+            return None
+        data = update.callback_query.data
+        if not isinstance(data, str):
+            return None
+        action = parse_callback_data(data)
+        if action is None or action.command not in self.routes:
+            return None
+        return action
+
+    def collect_additional_context(
+        self,
+        context: BotContext,
+        update: Update,
+        application: Application,
+        check_result: CallbackAction,
+    ) -> None:
+        """Передает обработчику разобранное действие."""
+        context.action = check_result
+
+    async def dispatch(self, update: Update, context: BotContext):
+        """Вызывает обработчик команды действия."""
+        return await self.routes[context.action.command](update, context)
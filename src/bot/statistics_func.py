@@ -1,44 +1,132 @@
+import asyncio
 import logging
+from collections import Counter
 
-from sqlalchemy import select, text
+from sqlalchemy import BigInteger, Integer, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.models import Product
+from db.config import settings
+from db.core import async_session_factory
 
 logger = logging.getLogger(__name__)
 
+# Прибавляет накопленные просмотры одной командой. Продукты, удаленные
+# до сброса, отбрасываются соединением с таблицей product.
+FLUSH_VIEWS_SQL = text(
+    """
+    INSERT INTO product_view_counter (product_id, views)
+    SELECT product.id, deltas.views
+    FROM unnest(:product_ids, :views) AS deltas(product_id, views)
+    JOIN product ON product.id = deltas.product_id
+    ON CONFLICT (product_id) DO UPDATE
+    SET views = product_view_counter.views + EXCLUDED.views
+    """
+).bindparams(
+    bindparam("product_ids", type_=ARRAY(Integer)),
+    bindparam("views", type_=ARRAY(BigInteger)),
+)
+
 
-async def increment_view_stats(
-    session: AsyncSession, product_id: int, model=Product
-):
+class ViewCounter:
     """
-    Асинхронно увеличивает счетчик просмотров на 1.
+    Счетчик просмотров с отложенной записью в базу.
 
-    :param session: Асинхронная сессия базы данных.
-    :param model: модель (таблица) в которой есть счетчик кликов,
-    по умолчанию таблица Products
-    :param product_id: id нужной записи в таблице, используется как
-    идентификатор для блокировки.
+    Просмотры копятся в памяти и периодически сбрасываются в таблицу
+    product_view_counter одним запросом, поэтому показ карточки
+    не ждет записи в базу.
     """
-    # Блокировка с помощью pg_advisory_xact_lock
-
-    await session.execute(text(f"SELECT pg_advisory_xact_lock({product_id})"))
-    logger.info(f"Блокировка установлена для продукта с ID: {product_id}")
-
-    # Получение продукта по id
-    stmt = select(model).where(model.id == product_id)
-    result = await session.execute(stmt)
-    product = result.scalar_one_or_none()
-
-    if product:
-        # Увеличиваем счетчик просмотров
-        if not product.view_stats:
-            product.view_stats = 0
-        product.view_stats += 1
-        await session.commit()
+
+    def __init__(self, flush_interval: float):
+        """
+        Инициализация.
+
+        :param flush_interval: Интервал сброса просмотров в секундах.
+        """
+        self.flush_interval = flush_interval
+        self._pending: Counter[int] = Counter()
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+    def add(self, product_id: int, views: int = 1) -> None:
+        """Учитывает просмотр продукта."""
+        self._pending[product_id] += views
+
+    async def flush(self, session: AsyncSession) -> None:
+        """
+        Записывает накопленные просмотры в базу.
+
+        При ошибке записи просмотры возвращаются в буфер и будут
+        записаны при следующем сбросе.
+
+        :param session: Асинхронная сессия SQLAlchemy.
+        """
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, Counter()
+        try:
+            await session.execute(
+                FLUSH_VIEWS_SQL,
+                {
+                    "product_ids": list(pending.keys()),
+                    "views": list(pending.values()),
+                },
+            )
+            await session.commit()
+        except Exception:
+            self._pending.update(pending)
+            raise
         logger.info(
-            f"Счетчик просмотров для продукта с ID {product_id} "
-            "увеличен на 1."
+            f"Записаны просмотры {sum(pending.values())} "
+            f"для {len(pending)} продуктов."
         )
-    else:
-        logger.warning(f"Продукт с ID {product_id} не найден.")
+
+    async def run(self) -> None:
+        """
+        Периодически сбрасывает просмотры в базу до вызова stop.
+
+        Задача не отменяется, а завершается после текущего сброса:
+        отмена во время записи потеряла бы взятые из буфера просмотры.
+        """
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(
+                    self._stopping.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            else:
+                return
+            try:
+                async with async_session_factory() as session:
+                    await self.flush(session)
+            except Exception as e:
+                logger.error(f"Ошибка при записи просмотров: {e}")
+
+    def start(self) -> None:
+        """Запускает периодический сброс просмотров."""
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Останавливает периодический сброс и записывает остаток."""
+        if self._task is not None:
+            # Дожидаемся сброса, который уже выполняется
+            self._stopping.set()
+            await self._task
+            self._task = None
+        async with async_session_factory() as session:
+            await self.flush(session)
+
+
+view_counter = ViewCounter(settings.VIEW_COUNTER_FLUSH_INTERVAL)
+
+
+def increment_view_stats(product_id: int) -> None:
+    """
+    Увеличивает счетчик просмотров продукта на 1.
+
+    :param product_id: id продукта, просмотры которого учитываются.
+    """
+    view_counter.add(product_id)
@@ -0,0 +1,169 @@
+import hashlib
+import logging
+from typing import Awaitable, Callable
+
+import telegram.error
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from telegram import Message
+
+from db.cache import TTLCache
+from db.config import settings
+from db.models import TelegramFile
+
+logger = logging.getLogger(__name__)
+
+# Виды файлов продукта
+PHOTO = "photo"
+DOCUMENT = "document"
+
+# Кеш file_id в памяти: (id продукта, вид файла) -> (хеш ссылки, file_id)
+file_id_cache = TTLCache("file_id Telegram", settings.TELEGRAM_FILE_CACHE_SIZE)
+
+
+def get_url_hash(url: str) -> str:
+    """Возвращает хеш ссылки на файл."""
+    return hashlib.sha256(str(url).encode()).hexdigest()
+
+
+def get_message_file_id(message: Message, kind: str) -> str | None:
+    """Извлекает file_id из отправленного сообщения."""
+    if kind == PHOTO and message.photo:
+        # Последний размер фото - самый крупный
+        return message.photo[-1].file_id
+    if kind == DOCUMENT and message.document:
+        return message.document.file_id
+    return None
+
+
+async def get_file_id(
+    session: AsyncSession, product_id: int, kind: str, url: str
+) -> str | None:
+    """
+    Возвращает file_id файла продукта, если он загружен по этой ссылке.
+
+    Если администратор сменил ссылку, хеш не совпадет и сохраненный
+    file_id не будет использован.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param product_id: Идентификатор продукта.
+    :param kind: Вид файла (PHOTO или DOCUMENT).
+    :param url: Текущая ссылка на файл.
+    """
+    url_hash = get_url_hash(url)
+    cached = file_id_cache.get((product_id, kind))
+    if cached is not None:
+        cached_hash, file_id = cached
+        return file_id if cached_hash == url_hash else None
+
+    file_id = (
+        await session.execute(
+            select(TelegramFile.file_id).where(
+                TelegramFile.product_id == product_id,
+                TelegramFile.kind == kind,
+                TelegramFile.url_hash == url_hash,
+            )
+        )
+    ).scalar_one_or_none()
+    if file_id is not None:
+        file_id_cache.set((product_id, kind), (url_hash, file_id))
+    return file_id
+
+
+async def save_file_id(
+    session: AsyncSession,
+    product_id: int,
+    kind: str,
+    url: str,
+    file_id: str,
+) -> None:
+    """
+    Сохраняет file_id файла продукта, загруженного по ссылке.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param product_id: Идентификатор продукта.
+    :param kind: Вид файла (PHOTO или DOCUMENT).
+    :param url: Ссылка, по которой файл был загружен.
+    :param file_id: Идентификатор файла на серверах Telegram.
+    """
+    url_hash = get_url_hash(url)
+    stmt = insert(TelegramFile).values(
+        product_id=product_id,
+        kind=kind,
+        url_hash=url_hash,
+        file_id=file_id,
+    )
+    await session.execute(
+        stmt.on_conflict_do_update(
+            constraint="idx_unique_telegram_file",
+            set_={"url_hash": url_hash, "file_id": file_id},
+        )
+    )
+    await session.commit()
+    file_id_cache.set((product_id, kind), (url_hash, file_id))
+
+
+async def forget_file_id(
+    session: AsyncSession, product_id: int, kind: str
+) -> None:
+    """Удаляет сохраненный file_id, который Telegram больше не принимает."""
+    file_id_cache.pop((product_id, kind))
+    await session.execute(
+        TelegramFile.__table__.delete().where(
+            TelegramFile.product_id == product_id,
+            TelegramFile.kind == kind,
+        )
+    )
+    await session.commit()
+
+
+async def send_product_file(
+    session: AsyncSession,
+    send: Callable[..., Awaitable[Message]],
+    chat_id: int,
+    product_id: int,
+    kind: str,
+    url: str,
+    **kwargs,
+) -> Message:
+    """
+    Отправляет файл продукта, по возможности по сохраненному file_id.
+
+    При первой отправке Telegram загружает файл по ссылке, полученный
+    file_id сохраняется и используется при следующих отправках.
+
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param send: Метод бота для отправки (send_photo, send_document).
+    :param chat_id: Идентификатор чата.
+    :param product_id: Идентификатор продукта.
+    :param kind: Вид файла (PHOTO или DOCUMENT).
+    :param url: Ссылка на файл.
+    :param kwargs: Дополнительные параметры метода отправки.
+    :return: Отправленное сообщение.
+    """
+    file_id = await get_file_id(session, product_id, kind, url)
+    if file_id is not None:
+        try:
+            return await send(chat_id, file_id, **kwargs)
+        except telegram.error.BadRequest as e:
+            logger.warning(
+                f"Telegram не принял file_id продукта {product_id} "
+                f"({kind}): {e}. Файл будет загружен по ссылке."
+            )
+            await forget_file_id(session, product_id, kind)
+
+    message = await send(chat_id, url, **kwargs)
+    new_file_id = get_message_file_id(message, kind)
+    if new_file_id is not None:
+        try:
+            await save_file_id(session, product_id, kind, url, new_file_id)
+        except SQLAlchemyError as e:
+            # Файл уже отправлен, без file_id он будет загружен повторно
+            await session.rollback()
+            logger.error(
+                f"Ошибка при сохранении file_id продукта {product_id} "
+                f"({kind}): {e}"
+            )
+    return message
@@ -1,60 +1,65 @@
 import logging
 
-from telegram import InlineKeyboardMarkup
 from telegram.ext import CallbackContext
 
+from db.config import settings
+
 logger = logging.getLogger(__name__)
 
 
 def save_state(
     context: CallbackContext,
-    state: str,
-    message_text: str,
-    reply_markup: InlineKeyboardMarkup,
+    state: int,
     handler_name: str = None,
+    screen: str = None,
+    page: int = 0,
 ) -> None:
     """
     Сохраняет текущее состояние пользователя.
 
+    В историю записывается компактная запись, по которой экран строится
+    заново, а не текст сообщения с клавиатурой. Глубина истории
+    ограничена настройкой HISTORY_DEPTH.
+
     :param context: Контекст вызова, содержащий данные пользователя.
-    :param state: Строка, описывающая текущее состояние пользователя.
-    :param message_text: Текст сообщения, связанного с текущим состоянием.
-    :param reply_markup: Разметка клавиатуры, связанная с текущим состоянием.
+    :param state: Состояние диалога, в которое перешел пользователь.
     :param handler_name: Название обработчика, который вызвал состояние.
+    :param screen: Название статичного экрана (главное меню, о боте),
+    если состояние показано не обработчиком этапа отбора.
+    :param page: Номер страницы этапа.
     :return: None
     """
     user_id = context.user_data.get("user_id", "неизвестен")
+    history = context.user_data.setdefault("history", [])
+    entry = {
+        "state": state,
+        "handler_name": handler_name,
+        "screen": screen,
+        "page": page,
+    }
 
     # Проверка на дублирующее состояние
-    if "history" in context.user_data and context.user_data["history"]:
-        last_state = context.user_data["history"][-1]
+    if history:
+        last_state = history[-1]
         if (
             last_state["state"] == state
-            and last_state["message_text"] == message_text
+            and last_state.get("handler_name") == handler_name
+            and last_state.get("screen") == screen
         ):
             logger.info(
-                f"Пользователь {user_id} пытается сохранить "
-                f"дублирующее состояние, пропускаем."
+                f"Пользователь {user_id} остается в состоянии {state}, "
+                f"обновляем запись истории."
             )
+            history[-1] = entry
             return
 
     logger.info(
         f"Пользователь {user_id} сохраняет состояние: {state}, "
-        f"с сообщением: {message_text}"
-    )
-
-    # Сохранение состояния в историю пользователя
-    if "history" not in context.user_data:
-        context.user_data["history"] = []
-
-    context.user_data["history"].append(
-        {
-            "state": state,
-            "message_text": message_text,
-            "reply_markup": reply_markup,
-            "handler_name": handler_name,
-        }
+        f"обработчик: {handler_name or screen}"
     )
+    history.append(entry)
+    if len(history) > settings.HISTORY_DEPTH:
+        del history[: len(history) - settings.HISTORY_DEPTH]
 
 
 def load_previous_state(context: CallbackContext) -> dict | None:
@@ -101,3 +106,34 @@ def clear_pagination_state(context: CallbackContext) -> None:
     if "pagination" in context.user_data:
         del context.user_data["pagination"]
         logger.info("Состояние пагинации очищено.")
+
+
+def get_range_position(value: float, filter_step: dict) -> int:
+    """
+    Возвращает номер диапазона, в который попадает значение.
+
+    :param value: Значение поля, по которому строятся диапазоны.
+    :param filter_step: Настройки этапа отбора из FILTER_STEPS_DATA.
+    :return: Порядковый номер диапазона, начиная с нуля.
+    """
+    full_range = filter_step["range"] + filter_step["range_step"]
+    return int(value // full_range)
+
+
+def get_range_label(position: int, filter_step: dict) -> str:
+    """
+    Возвращает подпись диапазона по его номеру, например "1.5 - 1.9".
+
+    :param position: Порядковый номер диапазона.
+    :param filter_step: Настройки этапа отбора из FILTER_STEPS_DATA.
+    :return: Строка диапазона для кнопки.
+    """
+    values_range = filter_step["range"]
+    full_range = values_range + filter_step["range_step"]
+    digits_after_dot = filter_step["digits_after_dot"]
+    return " - ".join(
+        (
+            str(round(position * full_range, digits_after_dot)),
+            str(round(position * full_range + values_range, digits_after_dot)),
+        )
+    )
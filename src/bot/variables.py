@@ -1,4 +1,10 @@
-from db.models import Brand, Character, Product, TypeProduct
+from db.models import (
+    Brand,
+    Character,
+    Product,
+    ProductCharacterAssociation,
+    TypeProduct,
+)
 
 # Этапы диалога
 (
@@ -10,6 +16,10 @@ from db.models import Brand, Character, Product, TypeProduct
     SHOW_RESULT,
 ) = range(6)
 
+# Кнопки этапов передают id значений (для диапазонов - номер диапазона),
+# продукты отбираются по ним через filter_field: внешний или первичный
+# ключ, к таблице которого при необходимости присоединяется
+# filter_join_fields. where_field - поле подписи значения.
 FILTER_STEPS_DATA = {
     1: {
         "query_fields": [TypeProduct.id, TypeProduct.name],
@@ -18,6 +28,8 @@ FILTER_STEPS_DATA = {
         "order_fields": [TypeProduct.name],
         "join_fields": [Product.typeproduct],
         "where_field": TypeProduct.name,
+        "filter_field": Product.typeproduct_id,
+        "filter_join_fields": [],
         "by_range": False,
         "range": 0,
         "range_step": 0,
@@ -31,6 +43,11 @@ FILTER_STEPS_DATA = {
         "order_fields": [Character.name],
         "join_fields": [Product.character],
         "where_field": Character.name,
+        "filter_field": ProductCharacterAssociation.character_id,
+        "filter_join_fields": [
+            ProductCharacterAssociation,
+            ProductCharacterAssociation.product_id == Product.id,
+        ],
         "by_range": False,
         "range": 0,
         "range_step": 0,
@@ -44,6 +61,8 @@ FILTER_STEPS_DATA = {
         "order_fields": [Product.power],
         "join_fields": [],
         "where_field": Product.power,
+        "filter_field": Product.power,
+        "filter_join_fields": [],
         "by_range": True,
         "range": 0.4,
         "range_step": 0.1,
@@ -57,6 +76,8 @@ FILTER_STEPS_DATA = {
         "order_fields": [Brand.name],
         "join_fields": [Product.brand],
         "where_field": Brand.name,
+        "filter_field": Product.brand_id,
+        "filter_join_fields": [],
         "by_range": False,
         "range": 0,
         "range_step": 0,
@@ -82,6 +103,8 @@ FILTER_STEPS_DATA = {
         "order_fields": [Product.model],
         "join_fields": [],
         "where_field": Product.model,
+        "filter_field": Product.id,
+        "filter_join_fields": [],
         "by_range": False,
         "range": 0,
         "range_step": 0,
@@ -107,6 +130,8 @@ FILTER_STEPS_DATA = {
         "order_fields": [Product.model],
         "join_fields": [],
         "where_field": Product.model,
+        "filter_field": Product.id,
+        "filter_join_fields": [],
         "by_range": False,
         "range": 0,
         "range_step": 0,
@@ -142,7 +167,35 @@ MULTIPLE_STEP_SELECTION_KEY = {
     "model": 5,  # 5 select_model
 }
 
-HANDLE_PAGINATOR_PATTERN = r"^(prev|next)_[0-9]+$"
+# Текст сообщения, если по критериям отбора ничего не найдено
+DATA_NOT_FOUND_TEXT = (
+    "К сожалению, данные не найдены. Попробуйте изменить критерии отбора."
+)
+
+# Статичные экраны бота, которые строятся заново при возврате назад
+GREETING_SCREEN = "greeting"
+MAIN_MENU_SCREEN = "main_menu"
+ABOUT_SCREEN = "about"
+
+GREETING_TEXT = (
+    "Добрый день! Введите ваш запрос или выберите действие "
+    "из предложенных кнопок."
+)
+MAIN_MENU_TEXT = "Вы вернулись в главное меню."
+ABOUT_TEXT = (
+    "Этот бот предназначен для помощи в выборе и покупке кондиционеров "
+    "и другой техники.\n"
+    "Вы можете использовать его для:\n\n"
+    "1. *Выбора категории товаров* - просто выберите "
+    "интересующую вас категорию.\n"
+    "2. *Подбора подходящего оборудования* - выберите тип и бренд, "
+    "чтобы найти оптимальные модели.\n"
+    "3. *Получения информации о моделях* - просмотрите краткое описание "
+    "и откройте подробные данные по каждой модели.\n\n"
+    "Используйте меню, чтобы начать или вернуться в главное меню "
+    "в любое время."
+)
+
 # кол-во элементов на страницу для пагинатора
 ITEMS_PER_PAGE = 2
 # Список названий состояний-функций
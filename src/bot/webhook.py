@@ -0,0 +1,274 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+
+import orjson
+from telegram import Update
+from telegram.ext import Application
+
+from bot.processor import ChatUpdateProcessor
+from db.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateQueue(asyncio.Queue):
+    """
+    Очередь обновлений бота с ограничением числа необработанных.
+
+    Application забирает обновления из очереди сразу, а обработку
+    отмечает вызовом task_done, поэтому ограничение применяется
+    к обновлениям, которые приняты, но еще не обработаны. Обновления,
+    ожидающие в очередях чатов processor, Application уже отметил
+    обработанными, они учитываются по счетчику processor. Методы put
+    служебные сигналы Application не ограничивают, проверка выполняется
+    в offer при приеме вебхука.
+    """
+
+    def __init__(
+        self, max_backlog: int, processor: ChatUpdateProcessor = None
+    ):
+        """
+        Инициализация.
+
+        :param max_backlog: Максимальное число необработанных обновлений,
+        0 - без ограничения.
+        :param processor: Обработчик обновлений приложения, если он
+        ставит обновления в очереди чатов.
+        """
+        super().__init__()
+        self.max_backlog = max_backlog
+        self.processor = processor
+        self.backlog = 0
+        self.accepted = 0
+        self.shed = 0
+
+    def put_nowait(self, item) -> None:
+        """Ставит элемент в очередь и учитывает его как необработанный."""
+        super().put_nowait(item)
+        self.backlog += 1
+
+    def task_done(self) -> None:
+        """Отмечает обработку элемента."""
+        super().task_done()
+        self.backlog -= 1
+
+    def get_pending(self) -> int:
+        """Возвращает число обновлений в очередях чатов."""
+        return self.processor.pending if self.processor else 0
+
+    def is_full(self) -> bool:
+        """Проверяет, достигнуто ли ограничение необработанных обновлений."""
+        return 0 < self.max_backlog <= self.backlog + self.get_pending()
+
+    def offer(self, update: Update) -> bool:
+        """
+        Ставит обновление в очередь, если она не переполнена.
+
+        :return: True, если обновление принято, False, если отброшено.
+        """
+        if self.is_full():
+            self.shed += 1
+            return False
+        self.put_nowait(update)
+        self.accepted += 1
+        return True
+
+    def stats(self) -> dict:
+        """Возвращает статистику очереди."""
+        return {
+            "depth": self.qsize(),
+            "backlog": self.backlog,
+            "pending": self.get_pending(),
+            "max_backlog": self.max_backlog,
+            "accepted": self.accepted,
+            "shed": self.shed,
+        }
+
+
+class RecentUpdateIds:
+    """
+    Скользящее окно id недавно принятых обновлений.
+
+    Хранит не больше maxsize id и не дольше ttl секунд, самые старые
+    записи вытесняются первыми.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Инициализация.
+
+        :param maxsize: Максимальное число запоминаемых id.
+        :param ttl: Время хранения id в секундах.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.duplicates = 0
+        # id обновления -> время приема, в порядке приема
+        self._ids: OrderedDict[int, float] = OrderedDict()
+
+    def expire(self, now: float) -> None:
+        """Удаляет id, принятые раньше чем ttl секунд назад."""
+        while self._ids:
+            update_id, accepted_at = next(iter(self._ids.items()))
+            if now - accepted_at < self.ttl:
+                break
+            self._ids.popitem(last=False)
+
+    def is_duplicate(self, update_id: int) -> bool:
+        """Проверяет, принималось ли обновление, и учитывает повтор."""
+        self.expire(time.monotonic())
+        if update_id in self._ids:
+            self.duplicates += 1
+            return True
+        return False
+
+    def add(self, update_id: int) -> None:
+        """Запоминает id принятого обновления."""
+        if self.maxsize <= 0:
+            return
+        self._ids[update_id] = time.monotonic()
+        while len(self._ids) > self.maxsize:
+            self._ids.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Возвращает статистику повторных доставок."""
+        return {"tracked": len(self._ids), "duplicates": self.duplicates}
+
+
+class TelegramWebhookApp:
+    """
+    ASGI-приложение, принимающее вебхуки Telegram.
+
+    Запросы на адрес вебхука разбираются без Flask: тело декодируется
+    orjson и обновление сразу ставится в очередь приложения бота.
+    Тело больше WEBHOOK_MAX_BODY_SIZE отклоняется с 413 без чтения
+    остатка. Если очередь переполнена, Telegram получает 503 с Retry-After
+    и повторит отправку позже. Повторная доставка уже принятого
+    обновления подтверждается без постановки в очередь. Остальные
+    запросы передаются приложению fallback (админ-панели).
+    """
+
+    def __init__(self, application: Application, fallback, path: str):
+        """
+        Инициализация.
+
+        :param application: Приложение бота.
+        :param fallback: ASGI-приложение для остальных запросов.
+        :param path: Адрес вебхука, например "/telegram".
+        """
+        self.application = application
+        self.fallback = fallback
+        self.path = path
+        self.recent_updates = RecentUpdateIds(
+            settings.WEBHOOK_DEDUP_SIZE, settings.WEBHOOK_DEDUP_TTL
+        )
+
+    def is_webhook(self, scope: dict) -> bool:
+        """Проверяет, что запрос адресован вебхуку."""
+        # Адрес вебхука может прийти с двойной косой чертой в начале
+        return (
+            scope["type"] == "http"
+            and scope["method"] == "POST"
+            and "/" + scope["path"].lstrip("/") == self.path
+        )
+
+    async def __call__(self, scope: dict, receive, send) -> None:
+        """Обрабатывает запрос ASGI."""
+        if not self.is_webhook(scope):
+            await self.fallback(scope, receive, send)
+            return
+
+        body = None
+        if self.get_content_length(scope) <= settings.WEBHOOK_MAX_BODY_SIZE:
+            body = await self.read_body(
+                receive, settings.WEBHOOK_MAX_BODY_SIZE
+            )
+        if body is None:
+            logger.warning("Слишком большое тело запроса вебхука отклонено.")
+            await self.respond(send, HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return
+        try:
+            data = orjson.loads(body)
+            if not isinstance(data, dict):
+                raise ValueError("ожидался объект JSON")
+            update = Update.de_json(data=data, bot=self.application.bot)
+            if update is None:
+                raise ValueError("пустое обновление")
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            logger.warning(f"Некорректное обновление Telegram: {e}")
+            await self.respond(send, HTTPStatus.BAD_REQUEST)
+            return
+        if self.recent_updates.is_duplicate(update.update_id):
+            logger.info(
+                f"Повторная доставка обновления {update.update_id} пропущена."
+            )
+            await self.respond(send, HTTPStatus.OK)
+            return
+        if not self.application.update_queue.offer(update):
+            logger.warning(
+                f"Очередь обновлений переполнена, обновление "
+                f"{update.update_id} отклонено."
+            )
+            await self.respond(
+                send,
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                [
+                    (
+                        b"retry-after",
+                        str(settings.UPDATE_QUEUE_RETRY_AFTER).encode(),
+                    )
+                ],
+            )
+            return
+        # Отклоненное обновление не запоминается, Telegram доставит его снова
+        self.recent_updates.add(update.update_id)
+        await self.respond(send, HTTPStatus.OK)
+
+    @staticmethod
+    def get_content_length(scope: dict) -> int:
+        """Возвращает заявленную длину тела запроса или 0, если ее нет."""
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    return int(value)
+                except ValueError:
+                    return 0
+        return 0
+
+    @staticmethod
+    async def read_body(receive, max_size: int) -> bytes | None:
+        """
+        Читает тело запроса.
+
+        :param max_size: Максимальный размер тела в байтах.
+        :return: Тело запроса или None, если оно больше max_size.
+        """
+        chunks = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > max_size:
+                return None
+            chunks.append(chunk)
+            more_body = message.get("more_body", False)
+        return b"".join(chunks)
+
+    @staticmethod
+    async def respond(
+        send, status: HTTPStatus, headers: list[tuple[bytes, bytes]] = None
+    ) -> None:
+        """Отправляет пустой ответ с кодом status."""
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status.value,
+                "headers": [(b"content-length", b"0"), *(headers or [])],
+            }
+        )
+        await send({"type": "http.response.body", "body": b""})
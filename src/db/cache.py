@@ -0,0 +1,78 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    LRU-кеш с ограничением времени жизни записей.
+
+    Потокобезопасен: очистка может вызываться из потоков административной
+    панели, пока бот читает кеш в своем цикле событий. Закешированные
+    значения общие для всех читателей, изменять их нельзя.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float | None = None):
+        """
+        Инициализация.
+
+        :param name: Название кеша для логов и статистики.
+        :param maxsize: Максимальное число записей.
+        :param ttl: Время жизни записи в секундах, None - без ограничения.
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float | None, Any]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Возвращает значение по ключу или default, если его нет."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Сохраняет значение, вытесняя самые старые записи."""
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Удаляет запись по ключу."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate(self) -> None:
+        """Очищает кеш полностью."""
+        with self._lock:
+            self._data.clear()
+        logger.info(f"Кеш {self.name} очищен. Статистика: {self.stats()}")
+
+    def stats(self) -> dict:
+        """Возвращает размер кеша и счетчики попаданий и промахов."""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
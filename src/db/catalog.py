@@ -0,0 +1,36 @@
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+_catalog_lock = threading.Lock()
+_catalog_version = 0
+_catalog_listeners: list[Callable[[], None]] = []
+
+
+def get_catalog_version() -> int:
+    """Возвращает текущую версию каталога продукции."""
+    return _catalog_version
+
+
+def bump_catalog_version() -> None:
+    """
+    Увеличивает версию каталога после изменения данных.
+
+    Вызывается административной панелью после каждой записи в таблицы
+    каталога, чтобы бот перестроил закешированные данные.
+    """
+    global _catalog_version
+    with _catalog_lock:
+        _catalog_version += 1
+    for listener in _catalog_listeners:
+        try:
+            listener()
+        except Exception as e:
+            logger.error(f"Ошибка при сбросе данных каталога: {e}")
+
+
+def register_catalog_listener(listener: Callable[[], None]) -> None:
+    """Регистрирует функцию, вызываемую при каждом изменении каталога."""
+    _catalog_listeners.append(listener)
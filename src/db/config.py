@@ -19,6 +19,46 @@ class Settings(BaseSettings):
     SERVER_URL: str
     UVICORN_PORT: int
     UVICORN_SERVER: str
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    FACET_ENGINE_ENABLED: bool = False
+    FACET_ENGINE_TTL: int = 300
+    STEP_CACHE_SIZE: int = 1024
+    STEP_CACHE_TTL: int = 60
+    KEYBOARD_CACHE_SIZE: int = 4096
+    PRODUCT_CACHE_SIZE: int = 512
+    PRODUCT_CACHE_TTL: int = 300
+    TELEGRAM_FILE_CACHE_SIZE: int = 2048
+    VIEW_COUNTER_FLUSH_INTERVAL: int = 30
+    # Хранилище состояния диалогов: postgres, file или none
+    BOT_PERSISTENCE: str = "postgres"
+    BOT_PERSISTENCE_INTERVAL: int = 30
+    # Число пользователей и чатов, загрузка данных которых запоминается
+    BOT_PERSISTENCE_LOADED_SIZE: int = 100000
+    HISTORY_DEPTH: int = 20
+    # Число чатов, обновления которых обрабатываются одновременно
+    BOT_CONCURRENT_UPDATES: int = 64
+    # Число принятых, но не обработанных обновлений, после которого
+    # вебхук отвечает 503; 0 - без ограничения
+    UPDATE_QUEUE_SIZE: int = 1000
+    UPDATE_QUEUE_RETRY_AFTER: int = 5
+    # Окно id принятых обновлений для отбрасывания повторных доставок
+    WEBHOOK_DEDUP_SIZE: int = 10000
+    WEBHOOK_DEDUP_TTL: int = 3600
+    # Максимальный размер тела запроса вебхука в байтах
+    WEBHOOK_MAX_BODY_SIZE: int = 2 * 1024 * 1024
+    AUTH_USER_CACHE_SIZE: int = 256
+    AUTH_USER_CACHE_TTL: int = 60
+    # Стоимость хеширования паролей bcrypt и число потоков для него
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_WORKERS: int = 2
+    # Число строк на странице списков админ-панели
+    ADMIN_PAGE_SIZE: int = 50
+    ADMIN_LOOKUP_CACHE_TTL: int = 300
 
     @property
     def database_url(self):
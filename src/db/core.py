@@ -1,18 +1,92 @@
-from sqlalchemy import NullPool
+import threading
+import time
+
+from sqlalchemy import AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from db.config import settings
 
+
+class ObservedAsyncPool(AsyncAdaptedQueuePool):
+    """Пул соединений, собирающий статистику ожидания соединений."""
+
+    def __init__(self, *args, **kwargs):
+        """Инициализация."""
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_time = 0.0
+        self.checkout_time_max = 0.0
+        self.timeouts = 0
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        """Выдает соединение из пула и замеряет время ожидания."""
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self.checkouts += 1
+            self.checkout_time += elapsed
+            self.checkout_time_max = max(self.checkout_time_max, elapsed)
+        return connection
+
+    def stats(self) -> dict:
+        """Возвращает статистику пула."""
+        with self._stats_lock:
+            checkouts = self.checkouts
+            checkout_time = self.checkout_time
+            checkout_time_max = self.checkout_time_max
+            timeouts = self.timeouts
+        capacity = self.size() + self._max_overflow
+        checked_out = self.checkedout()
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": checked_out,
+            "checked_in": self.checkedin(),
+            "overflow": self.overflow(),
+            # Доля занятых соединений от максимально возможного числа
+            "saturation": (
+                round(checked_out / capacity, 3) if capacity > 0 else None
+            ),
+            "checkouts": checkouts,
+            "checkout_time_avg_ms": (
+                round(checkout_time / checkouts * 1000, 3)
+                if checkouts
+                else 0.0
+            ),
+            "checkout_time_max_ms": round(checkout_time_max * 1000, 3),
+            "timeouts": timeouts,
+        }
+
+
 async_engine = create_async_engine(
     url=settings.database_url,
-    echo=True,
-    poolclass=NullPool,
+    echo=settings.DB_ECHO,
+    poolclass=ObservedAsyncPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
 )
 
-
+# Представления админ-панели выполняются в том же цикле событий, что
+# и бот (см. admin.flask_app.AdminFlask), поэтому пул соединений общий.
 async_session_factory = async_sessionmaker(async_engine)
 
 
+def get_pool_stats() -> dict:
+    """Возвращает статистику пула соединений."""
+    return async_engine.pool.stats()
+
+
 async def get_async_session():
     """Генератор асинхронной сессии."""
     async with async_session_factory() as async_session:
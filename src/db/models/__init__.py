@@ -1,17 +1,23 @@
 __all__ = {
     "Base",
+    "BotState",
     "Brand",
     "TypeProduct",
     "Product",
     "Character",
     "ProductCharacterAssociation",
+    "ProductViewCounter",
+    "TelegramFile",
     "User",
 }
 
 from .base import Base
+from .bot_state import BotState
 from .brand import Brand
 from .character import Character
 from .product import Product
 from .product_character_association import ProductCharacterAssociation
+from .product_view_counter import ProductViewCounter
+from .telegram_file import TelegramFile
 from .type_product import TypeProduct
 from .user import User, UserRoleType
@@ -0,0 +1,24 @@
+from sqlalchemy import LargeBinary, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.annotate import updated_at
+from db.models import Base
+
+
+class BotState(Base):
+    """Модель для сохраненного состояния диалогов бота."""
+
+    __tablename__ = "bot_state"
+    __table_args__ = (
+        UniqueConstraint(
+            "kind",
+            "key",
+            name="idx_unique_bot_state",
+        ),
+    )
+
+    # Вид данных: пользователь, чат или состояние диалога
+    kind: Mapped[str] = mapped_column(String(16))
+    key: Mapped[str] = mapped_column(String(255))
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+    updated_at: Mapped[updated_at]
@@ -10,6 +10,7 @@ from db.models import Base
 if TYPE_CHECKING:
     from .brand import Brand
     from .character import Character
+    from .product_view_counter import ProductViewCounter
     from .type_product import TypeProduct
 
 
@@ -37,12 +38,14 @@ class Product(Base):
         secondary="product_character_association",
         back_populates="product",
     )
-    typeproduct_id: Mapped[int] = mapped_column(ForeignKey("typeproduct.id"))
+    typeproduct_id: Mapped[int] = mapped_column(
+        ForeignKey("typeproduct.id"), index=True
+    )
     typeproduct: Mapped["TypeProduct"] = relationship(
         back_populates="product", lazy="selectin"
     )
 
-    brand_id: Mapped[int] = mapped_column(ForeignKey("brand.id"))
+    brand_id: Mapped[int] = mapped_column(ForeignKey("brand.id"), index=True)
     brand: Mapped["Brand"] = relationship(
         back_populates="product", lazy="selectin"
     )
@@ -53,13 +56,22 @@ class Product(Base):
         default="",
         server_default="",
     )
-    price: Mapped[int | None]
-    power: Mapped[float | None]
-    view_stats: Mapped[int | None]
+    price: Mapped[int | None] = mapped_column(index=True)
+    power: Mapped[float | None] = mapped_column(index=True)
     pdf_url: Mapped[str] = mapped_column(URLType)
     image_url: Mapped[str] = mapped_column(URLType)
     created_at: Mapped[created_at]
     updated_at: Mapped[updated_at]
+    # Счетчик просмотров хранится отдельно, чтобы не обновлять строку
+    # продукта при каждом просмотре
+    view_counter: Mapped["ProductViewCounter | None"] = relationship(
+        lazy="selectin", viewonly=True
+    )
+
+    @property
+    def view_stats(self) -> int:
+        """Количество просмотров продукта."""
+        return self.view_counter.views if self.view_counter else 0
 
     @classmethod
     def get_field_names(cls):
@@ -72,12 +84,12 @@ class Product(Base):
             cls.DESCRIPTION,
             cls.PRICE,
             cls.POWER,
-            cls.VIEW,
             cls.PDF,
             cls.IMG,
             cls.CREATE,
             cls.UPDATE,
             cls.CHARACTER,
+            cls.VIEW,
         ]
 
     def __repr__(self):
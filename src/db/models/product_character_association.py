@@ -17,4 +17,6 @@ class ProductCharacterAssociation(Base):
     )
 
     product_id: Mapped[int] = mapped_column(ForeignKey("product.id"))
-    character_id: Mapped[int] = mapped_column(ForeignKey("character.id"))
+    character_id: Mapped[int] = mapped_column(
+        ForeignKey("character.id"), index=True
+    )
@@ -0,0 +1,17 @@
+from sqlalchemy import BigInteger, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.models import Base
+
+
+class ProductViewCounter(Base):
+    """Модель для счетчика просмотров продукта."""
+
+    __tablename__ = "product_view_counter"
+
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("product.id", ondelete="CASCADE"), unique=True
+    )
+    views: Mapped[int] = mapped_column(
+        BigInteger, default=0, server_default="0"
+    )
@@ -0,0 +1,26 @@
+from sqlalchemy import ForeignKey, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.models import Base
+
+
+class TelegramFile(Base):
+    """Модель для file_id файлов продукта, уже загруженных в Telegram."""
+
+    __tablename__ = "telegram_file"
+    __table_args__ = (
+        UniqueConstraint(
+            "product_id",
+            "kind",
+            name="idx_unique_telegram_file",
+        ),
+    )
+
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("product.id", ondelete="CASCADE")
+    )
+    # Вид файла: фото или документ
+    kind: Mapped[str] = mapped_column(String(16))
+    # Хеш ссылки, по которой файл был загружен
+    url_hash: Mapped[str] = mapped_column(String(64))
+    file_id: Mapped[str]
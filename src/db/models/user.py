@@ -1,12 +1,22 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum as PyEnum
 
 import bcrypt
 from sqlalchemy import Enum, String
 from sqlalchemy.orm import Mapped, mapped_column
 
+from db.config import settings
 from db.core import get_async_session
 from db.models import Base
 
+# bcrypt отпускает GIL на время вычисления хеша, поэтому хеширование
+# в отдельных потоках не блокирует цикл событий бота и админ-панели.
+# Число потоков ограничено, чтобы одновременные входы не заняли все ядра.
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.BCRYPT_WORKERS, thread_name_prefix="bcrypt"
+)
+
 
 class UserRoleType(PyEnum):
     """Перечисление для ролей пользователей."""
@@ -30,6 +40,20 @@ ROLE_PERMISSIONS = {
 }
 
 
+def role_has_permission(role: UserRoleType | str, permission: str) -> bool:
+    """
+    Проверка, есть ли у роли определенные права.
+
+    :param role: Роль или ее название, например "editor_role".
+    :param permission: Название права, например "edit".
+    """
+    try:
+        role = UserRoleType(role)
+    except ValueError:
+        return False
+    return permission in ROLE_PERMISSIONS.get(role, [])
+
+
 class User(Base):
     """Модель пользователя."""
 
@@ -45,17 +69,24 @@ class User(Base):
 
     async def set_password(self, password: str):
         """Метод для установки пароля."""
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password.encode(), salt).decode()
+        salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+        password_hash = await asyncio.get_running_loop().run_in_executor(
+            password_executor, bcrypt.hashpw, password.encode(), salt
+        )
+        self.password_hash = password_hash.decode()
 
     async def check_password(self, password: str) -> bool:
         """Метод для проверки пароля."""
-        return bcrypt.checkpw(password.encode(), self.password_hash.encode())
+        return await asyncio.get_running_loop().run_in_executor(
+            password_executor,
+            bcrypt.checkpw,
+            password.encode(),
+            self.password_hash.encode(),
+        )
 
     async def has_permission(self, permission: str) -> bool:
         """Проверка, имеет ли пользователь определенные права."""
-        permissions = ROLE_PERMISSIONS.get(self.role, [])
-        return permission in permissions
+        return role_has_permission(self.role, permission)
 
     @classmethod
     def get_field_names(cls):  # noqa
@@ -1,20 +1,26 @@
 import asyncio
 import logging
-from http import HTTPStatus
 
 import uvicorn
 from asgiref.wsgi import WsgiToAsgi
-from flask import Response, request
-from telegram import Update
+from flask import Response, jsonify
 
 from admin import app
+from admin.permission import requires_permission
 from bot.bot import application, setup_handlers
+from bot.statistics_func import view_counter
+from bot.webhook import TelegramWebhookApp
 from db.config import settings
+from db.core import get_pool_stats
 
 logger = logging.getLogger(__name__)
 
 TELEGRAM_URL = "/telegram"
 
+# Вебхук Telegram обрабатывается без Flask, остальные запросы передаются
+# админ-панели
+asgi_app = TelegramWebhookApp(application, WsgiToAsgi(app), TELEGRAM_URL)
+
 
 async def set_webhook():
     """Устанавливает вебхук."""
@@ -25,22 +31,26 @@ async def set_webhook():
         )
 
 
-@app.post(f"{TELEGRAM_URL}")
-async def telegram() -> Response:
-    """Управляет очередью входящих сообщений Telegram."""
-    await application.update_queue.put(
-        Update.de_json(data=request.json, bot=application.bot)
+@app.get("/metrics")
+@requires_permission("view")
+async def metrics() -> Response:
+    """Возвращает статистику пула соединений и приема обновлений."""
+    return jsonify(
+        db_pool=get_pool_stats(),
+        update_queue=application.update_queue.stats(),
+        webhook=asgi_app.recent_updates.stats(),
     )
-    return Response(status=HTTPStatus.OK)
 
 
 async def main():
     """Выполняет одновременный запуск Flask и Telegram."""
     await setup_handlers()
     await set_webhook()
+    # Асинхронные представления админ-панели выполняются в этом же цикле
+    app.use_event_loop(asyncio.get_running_loop())
     webserver = uvicorn.Server(
         config=uvicorn.Config(
-            app=WsgiToAsgi(app),
+            app=asgi_app,
             port=int(settings.UVICORN_PORT),
             use_colors=False,
             host=settings.UVICORN_SERVER,
@@ -48,8 +58,16 @@ async def main():
     )
     async with application:
         await application.start()
-        await webserver.serve()
-        await application.stop()
+        view_counter.start()
+        try:
+            await webserver.serve()
+        finally:
+            try:
+                await application.stop()
+            finally:
+                # Записываем просмотры, накопленные до остановки, в том
+                # числе обновлениями, обработанными при остановке бота
+                await view_counter.stop()
 
 
 if __name__ == "__main__":